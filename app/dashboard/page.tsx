@@ -89,7 +89,7 @@ export default function DashboardPage() {
     }
     // Fetch all dashboard data in parallel for better performance
     Promise.all([
-      getDashboardData(), // Get general dashboard statistics
+      getDashboardData(token), // Get general dashboard statistics
       getUserSubjects(token), // Get user's subjects with progress
       getUserActivity(token), // Get user's recent activity
       getUserStats(token), // Get user's performance stats
@@ -58,12 +58,12 @@ export default function LeaderboardPage() {
     const fetchData = async () => {
       setLoading(true)
       try {
-        // Get leaderboard data
-        const leaderboardRes = await getLeaderboard(selectedPeriod)
+        // Get leaderboard data (with the token, so a score just submitted shows up at once)
+        const token = localStorage.getItem("authToken")
+        const leaderboardRes = await getLeaderboard(selectedPeriod, token)
         setLeaderboard(leaderboardRes.data)
 
         // Get user stats (if user is logged in)
-        const token = localStorage.getItem("authToken")
         if (token) {
           try {
             const statsRes = await getUserStats(token)
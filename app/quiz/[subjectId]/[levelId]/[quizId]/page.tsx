@@ -4,6 +4,8 @@
 // This page displays individual quiz questions for a specific quizId.
 // Handles quiz progression, answer submission, scoring, and completion tracking.
 // Includes timer functionality and immediate feedback for each question.
+// Uses answer protocol 2: answers are choice IDs, and the correct choices are only
+// known once the server has graded the submission.
 
 "use client";
 
@@ -32,7 +34,7 @@ import {
 } from "lucide-react";
 import Link from "next/link";
 import { useRouter, useParams } from "next/navigation";
-import { submitQuizById, getQuizById } from "@/lib/api";
+import { submitQuizById, getQuizById, getQuizExplanations } from "@/lib/api";
 
 export default function QuizPage() {
   const params = useParams();
@@ -42,21 +44,24 @@ export default function QuizPage() {
   const quizId = Number.parseInt(params.quizId as string);
 
   const [currentQuestionIndex, setCurrentQuestionIndex] = useState(0);
-  const [selectedAnswer, setSelectedAnswer] = useState<string | null>(null);
-  const [answers, setAnswers] = useState<{ [key: number]: string }>({});
+  const [selectedAnswer, setSelectedAnswer] = useState<number | null>(null);
+  const [answers, setAnswers] = useState<{ [key: number]: number }>({});
   const [timeLeft, setTimeLeft] = useState(300);
+  // One key per attempt: the timer's auto-submit and repeated clicks are graded once
+  const [submissionKey] = useState(() => crypto.randomUUID());
   const [quizCompleted, setQuizCompleted] = useState(false);
   const [score, setScore] = useState(0);
   const [result, setResult] = useState<any>(null);
   const [error, setError] = useState<string | null>(null);
   const [currentQuiz, setCurrentQuiz] = useState<any>(null);
   const [loading, setLoading] = useState(true);
+  const [explanations, setExplanations] = useState<{ [key: string]: any }>({});
 
   useEffect(() => {
     const fetchQuiz = async () => {
       try {
         setLoading(true);
-        const quizData = await getQuizById(quizId);
+        const quizData = await getQuizById(quizId, 2);
         setCurrentQuiz(quizData);
         setTimeLeft(300);
       } catch (err) {
@@ -87,7 +92,7 @@ export default function QuizPage() {
 
   const currentQuestion = currentQuiz?.questions?.[currentQuestionIndex];
 
-  const handleAnswerSelect = (answer: string) => {
+  const handleAnswerSelect = (answer: number) => {
     setSelectedAnswer(answer);
     if (currentQuestion) {
       setAnswers((prev) => ({ ...prev, [currentQuestion.id]: answer }));
@@ -101,33 +106,36 @@ export default function QuizPage() {
         setSelectedAnswer(null);
       } else {
         setQuizCompleted(true);
-        let correctCount = 0;
-        currentQuiz.questions.forEach((question: any, index: number) => {
-          if (answers[question.id] === question.correct) {
-            correctCount++;
-          }
-        });
-        setScore(
-          Math.round((correctCount / currentQuiz.questions.length) * 100)
-        );
         handleQuizComplete();
       }
     }
   };
 
   const handleQuizComplete = async () => {
+    const token = localStorage.getItem("authToken");
+    if (!token) return;
     try {
-      const token = localStorage.getItem("authToken");
-      if (token) {
-        await submitQuizById(quizId, answers, token);
-        // Do not redirect here; let the user see their results
-      }
+      const graded = await submitQuizById(quizId, answers, token, submissionKey, 2);
+      setResult(graded);
+      setScore(graded.score);
+      // Do not redirect here; let the user see their results
     } catch (err) {
       console.error("Error completing quiz:", err);
       // Optionally, show an error or allow retry
+      return;
+    }
+    // Explanations are only served once the quiz has been submitted
+    try {
+      setExplanations(await getQuizExplanations(quizId, token));
+    } catch (err) {
+      console.error("Error fetching explanations:", err);
     }
   };
 
+  // Option text for a choice ID (answers and correct_choices hold IDs)
+  const choiceText = (question: any, choiceId?: number) =>
+    question.options.find((option: any) => option.id === choiceId)?.text;
+
   const formatTime = (seconds: number) => {
     const mins = Math.floor(seconds / 60);
     const secs = seconds % 60;
@@ -200,17 +208,8 @@ export default function QuizPage() {
                   {score}%
                 </div>
                 <p className="text-slate-600">
-                  You got{" "}
-                  {
-                    Object.entries(answers).filter(
-                      ([qid, answer]) =>
-                        answer ===
-                        currentQuiz.questions.find(
-                          (q: any) => q.id === Number(qid)
-                        )?.correct
-                    ).length
-                  }{" "}
-                  out of {currentQuiz.questions.length} questions correct
+                  You got {result?.correct ?? 0} out of{" "}
+                  {currentQuiz.questions.length} questions correct
                 </p>
               </div>
 
@@ -220,7 +219,9 @@ export default function QuizPage() {
                 </h3>
                 {currentQuiz.questions.map((question: any, index: number) => {
                   const userAnswer = answers[question.id];
-                  const isCorrect = userAnswer === question.correct;
+                  const correctChoice = result?.correct_choices?.[question.id];
+                  const isCorrect = userAnswer === correctChoice;
+                  const feedback = explanations[question.id] || {};
 
                   return (
                     <div
@@ -247,24 +248,25 @@ export default function QuizPage() {
                                 isCorrect ? "text-green-700" : "text-red-700"
                               }
                             >
-                              Your answer: {userAnswer || "No answer"}
+                              Your answer:{" "}
+                              {choiceText(question, userAnswer) || "No answer"}
                             </p>
-                            {!isCorrect && (
+                            {!isCorrect && correctChoice && (
                               <p className="text-green-700">
-                                Correct answer: {question.correct}
+                                Correct answer: {choiceText(question, correctChoice)}
                               </p>
                             )}
                             <p className="text-slate-600 mt-2">
-                              {question.explanation}
+                              {feedback.explanation}
                             </p>
                             {/* Only show Additional Resources if there are any */}
-                            {!isCorrect && question.resources && question.resources.length > 0 && (
+                            {!isCorrect && feedback.resources && feedback.resources.length > 0 && (
                               <div className="mt-3">
                                 <p className="font-medium text-slate-700 mb-2">
                                   Additional Resources:
                                 </p>
                                 <div className="space-y-1">
-                                  {question.resources.map(
+                                  {feedback.resources.map(
                                     (resource: any, resourceIndex: number) => (
                                       <a
                                         key={resourceIndex}
@@ -392,12 +394,12 @@ export default function QuizPage() {
 
               <div className="space-y-3">
                 {currentQuestion.options.map(
-                  (option: string, index: number) => (
+                  (option: any) => (
                     <button
-                      key={index}
-                      onClick={() => handleAnswerSelect(option)}
+                      key={option.id}
+                      onClick={() => handleAnswerSelect(option.id)}
                       className={`w-full p-4 text-left rounded-lg border-2 transition-all ${
-                        selectedAnswer === option
+                        selectedAnswer === option.id
                           ? "border-blue-500 bg-blue-50"
                           : "border-slate-200 bg-white hover:border-slate-300 hover:bg-slate-50"
                       }`}
@@ -405,16 +407,16 @@ export default function QuizPage() {
                       <div className="flex items-center space-x-3">
                         <div
                           className={`w-4 h-4 rounded-full border-2 ${
-                            selectedAnswer === option
+                            selectedAnswer === option.id
                               ? "border-blue-500 bg-blue-500"
                               : "border-slate-300"
                           }`}
                         >
-                          {selectedAnswer === option && (
+                          {selectedAnswer === option.id && (
                             <div className="w-full h-full rounded-full bg-white scale-50" />
                           )}
                         </div>
-                        <span className="text-slate-900">{option}</span>
+                        <span className="text-slate-900">{option.text}</span>
                       </div>
                     </button>
                   )
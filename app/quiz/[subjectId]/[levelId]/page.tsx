@@ -31,12 +31,11 @@ import {
   Loader2,
 } from "lucide-react";
 import Link from "next/link";
-import { useRouter, useParams } from "next/navigation";
-import { submitQuizById, getQuizById } from "@/lib/api";
+import { useParams } from "next/navigation";
+import { submitQuizById, getQuizById, getQuizExplanations } from "@/lib/api";
 
 export default function QuizPage() {
   const params = useParams();
-  const router = useRouter();
   const subjectId = Number.parseInt(params.subjectId as string);
   const levelId = Number.parseInt(params.levelId as string);
   const quizId = Number.parseInt(params.quizId as string);
@@ -46,12 +45,15 @@ export default function QuizPage() {
   const [showResult, setShowResult] = useState(false);
   const [answers, setAnswers] = useState<{ [key: number]: string }>({});
   const [timeLeft, setTimeLeft] = useState(300);
+  // One key per attempt: the timer's auto-submit and repeated clicks are graded once
+  const [submissionKey] = useState(() => crypto.randomUUID());
   const [quizCompleted, setQuizCompleted] = useState(false);
   const [score, setScore] = useState(0);
   const [result, setResult] = useState<any>(null);
   const [error, setError] = useState<string | null>(null);
   const [currentQuiz, setCurrentQuiz] = useState<any>(null);
   const [loading, setLoading] = useState(true);
+  const [explanations, setExplanations] = useState<{ [key: string]: any } | null>(null);
 
   useEffect(() => {
     const fetchQuiz = async () => {
@@ -122,15 +124,20 @@ export default function QuizPage() {
   };
 
   const handleQuizComplete = async () => {
+    const token = localStorage.getItem("authToken");
+    if (!token) return;
     try {
-      const token = localStorage.getItem("authToken");
-      if (token) {
-        await submitQuizById(quizId, answers, token);
-        router.push(`/subject/${subjectId}`);
-      }
+      await submitQuizById(quizId, answers, token, submissionKey);
+      // Stay on the summary so the question review can show the explanations
     } catch (err) {
       console.error("Error completing quiz:", err);
-      router.push(`/subject/${subjectId}`);
+      return;
+    }
+    // Explanations are only served once the quiz has been submitted
+    try {
+      setExplanations(await getQuizExplanations(quizId, token));
+    } catch (err) {
+      console.error("Error fetching explanations:", err);
     }
   };
 
@@ -227,6 +234,7 @@ export default function QuizPage() {
                 {currentQuiz.questions.map((question: any, index: number) => {
                   const userAnswer = answers[question.id];
                   const isCorrect = userAnswer === question.correct;
+                  const feedback = explanations?.[question.id] || {};
 
                   return (
                     <div
@@ -261,15 +269,15 @@ export default function QuizPage() {
                               </p>
                             )}
                             <p className="text-slate-600 mt-2">
-                              {question.explanation}
+                              {feedback.explanation}
                             </p>
-                            {!isCorrect && question.resources && (
+                            {!isCorrect && feedback.resources && (
                               <div className="mt-3">
                                 <p className="font-medium text-slate-700 mb-2">
                                   Additional Resources:
                                 </p>
                                 <div className="space-y-1">
-                                  {question.resources.map(
+                                  {feedback.resources.map(
                                     (resource: any, resourceIndex: number) => (
                                       <a
                                         key={resourceIndex}
@@ -454,16 +462,16 @@ export default function QuizPage() {
                             : "Incorrect"}
                         </div>
                         <div className="text-slate-700 mb-3">
-                          {currentQuestion.explanation}
+                          {explanations?.[currentQuestion.id]?.explanation}
                         </div>
                         {selectedAnswer !== currentQuestion.correct &&
-                          currentQuestion.resources && (
+                          explanations?.[currentQuestion.id]?.resources && (
                             <div>
                               <div className="font-medium text-slate-700 mb-2">
                                 Additional Resources:
                               </div>
                               <div className="space-y-1">
-                                {currentQuestion.resources.map(
+                                {explanations[currentQuestion.id].resources.map(
                                   (resource: any, resourceIndex: number) => (
                                     <a
                                       key={resourceIndex}
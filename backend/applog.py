@@ -0,0 +1,68 @@
+# =============================================================================
+# STRUCTURED LOGGING - SAMPLED, WRITTEN OFF THE REQUEST PATH
+# =============================================================================
+# log_event("quiz_submitted", quiz_id=3, score=80) writes one JSON line to stderr:
+#   {"ts": "...", "level": "info", "event": "quiz_submitted", "quiz_id": 3, "score": 80}
+#
+# Records go onto an in-memory queue and a background thread (logging.handlers.QueueListener)
+# formats and writes them, so a slow terminal or log pipe never stalls a request thread or the
+# event loop. High-volume events pass sample=0.1 (or similar): about that share is kept, and kept
+# records carry "sample" so counts can be scaled back up.
+# CODETECH_LOG_LEVEL sets the level (default INFO).
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime
+
+logger = logging.getLogger("codetech")
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+_listener = None
+
+def configure():
+    """Attach the queue handler and start the writer thread (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter())
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(os.environ.get("CODETECH_LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    atexit.register(shutdown)
+
+def shutdown():
+    """Write out queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def log_event(event, level=logging.INFO, sample=1.0, **fields):
+    """Log an event with fields; keep it with probability `sample`"""
+    if sample < 1.0:
+        if random.random() >= sample:
+            return
+        fields["sample"] = sample
+    if _listener is None:
+        configure()
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
@@ -0,0 +1,178 @@
+# =============================================================================
+# QUIZ ATTEMPTS - SERVER-TIMED SESSIONS WITH A COMPACT ANSWER BUFFER
+# =============================================================================
+# An attempt goes through three steps:
+#
+#   start     POST /quiz/{quiz_id}/attempts         starts the server clock, creates the buffer
+#             (or POST /quiz/{subject_id}/{level_id}/attempts for randomized questions, pools.py)
+#   save      PUT  /attempts/{attempt_id}/answers   one or more answers, any number of times
+#   finalize  POST /attempts/{attempt_id}/finalize  grades the buffer and records the result
+#
+# The buffer is a single shared-cache entry per attempt (cache.py, so with CACHE_URL every
+# instance sees it): quiz id, owner, server start time and deadline, and one small int per
+# question holding the position of the chosen choice (-1 = unanswered). Saving an answer is one
+# cache read and one write. Only finalize touches the database.
+#
+# Grading compares the buffer with the quiz's answer key: question ids, choice ids and texts,
+# and the correct choice's position and id, built once per quiz (answer_key) and cached with the
+# catalogue. Grading a whole quiz is a comparison of two short int lists.
+#
+# Answers are sent in one of two protocols (the `protocol` query parameter on quiz, submit and
+# save endpoints):
+#   1  {question_id: choice text}, with the correct text in the quiz payload (original protocol,
+#      kept while clients migrate)
+#   2  {question_id: choice_id}; the quiz payload lists options as {id, text} without the answer,
+#      and the correct choice ids are only returned by the submit/finalize result
+#
+# The server enforces the time limit. Answers saved after the deadline (plus `grace` seconds
+# for network latency) are refused. Finalize grades whatever was saved in time. Saves to one
+# attempt are last-writer-wins, which is fine because each attempt has a single client.
+
+import time
+import uuid
+
+from cache import MISS
+
+UNANSWERED = -1
+PROTOCOLS = (1, 2)
+
+class AttemptError(Exception):
+    """Unknown/expired attempt, or an answer the attempt cannot take"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+def answer_key(quiz_id, questions):
+    """Answer key from [(question_id, [(choice_id, text, is_correct), ...]), ...] in display order"""
+    return {
+        "quiz_id": quiz_id,
+        "questions": [question_id for question_id, _ in questions],
+        "choices": [[choice_id for choice_id, _, _ in choices] for _, choices in questions],
+        "texts": [[text for _, text, _ in choices] for _, choices in questions],
+        "correct": [
+            next((i for i, (_, _, is_correct) in enumerate(choices) if is_correct), UNANSWERED)
+            for _, choices in questions
+        ],
+        "correct_choices": [
+            next((choice_id for choice_id, _, is_correct in choices if is_correct), 0)
+            for _, choices in questions
+        ],
+    }
+
+def check_answers(answers, protocol):
+    """Raise AttemptError unless answers match the protocol (texts for 1, choice ids for 2)"""
+    if protocol not in PROTOCOLS:
+        raise AttemptError(f"Unknown answer protocol {protocol}", 422)
+    expected = int if protocol == 2 else str
+    if not all(isinstance(answer, expected) for answer in answers.values()):
+        raise AttemptError(f"Answer protocol {protocol} expects {'choice ids' if protocol == 2 else 'choice texts'}", 422)
+
+def answer_positions(key, answers, protocol=1):
+    """{question index: choice position} for {question_id: choice text (1) or choice_id (2)}"""
+    check_answers(answers, protocol)
+    index = {question_id: i for i, question_id in enumerate(key["questions"])}
+    field = "choices" if protocol == 2 else "texts"
+    positions = {}
+    for question_id, answer in answers.items():
+        i = index.get(int(question_id))
+        if i is None:
+            raise AttemptError(f"Question {question_id} is not part of this quiz", 422)
+        try:
+            positions[i] = key[field][i].index(answer)
+        except ValueError:
+            raise AttemptError(f"Unknown choice for question {question_id}", 422)
+    return positions
+
+def grade(key, positions):
+    """Correct answers in a list of chosen positions (one per question)"""
+    return sum(1 for chosen, correct in zip(positions, key["correct"]) if chosen == correct != UNANSWERED)
+
+def grade_choice_ids(key, answers):
+    """Correct answers in {question_id: choice_id} (protocol 2): one int comparison per question"""
+    return sum(
+        1 for question_id, choice_id in zip(key["questions"], key["correct_choices"])
+        if choice_id and answers.get(question_id) == choice_id
+    )
+
+def grade_texts(key, answers):
+    """Correct answers in {question_id: choice text} (protocol 1)"""
+    return sum(
+        1 for question_id, texts, correct in zip(key["questions"], key["texts"], key["correct"])
+        if correct != UNANSWERED and answers.get(question_id) == texts[correct]
+    )
+
+def correct_choices(key):
+    """{question_id: correct choice_id}, returned once an attempt is graded"""
+    return dict(zip(key["questions"], key["correct_choices"]))
+
+class AttemptStore:
+    def __init__(self, cache, time_limit=300, grace=5, keep=3600, prefix="attempt"):
+        self.cache = cache
+        self.time_limit = time_limit  # Seconds to answer, from start
+        self.grace = grace  # Seconds after the deadline that saves are still taken
+        self.keep = keep  # Seconds the attempt stays finalizable (and its result readable) after the deadline
+        self.prefix = prefix
+
+    def _store(self, attempt):
+        ttl = max(1, int(attempt["deadline"] + self.keep - time.time()))
+        self.cache.set(f"{self.prefix}:{attempt['id']}", attempt, ttl)
+
+    def start(self, key, owner, pool=None):
+        """New attempt answering `key`; pool attempts also record the drawn questions (pools.py)"""
+        now = time.time()
+        attempt = {
+            "id": uuid.uuid4().hex,
+            "quiz_id": key["quiz_id"],
+            "pool": pool,
+            "owner": owner,
+            "started": now,
+            "deadline": now + self.time_limit,
+            "answers": [UNANSWERED] * len(key["questions"]),
+            "result": None,
+        }
+        self._store(attempt)
+        return attempt
+
+    def load(self, attempt_id, owner):
+        attempt = self.cache.get(f"{self.prefix}:{attempt_id}")
+        if attempt is MISS or attempt["owner"] != owner:
+            raise AttemptError("Attempt not found or expired", 404)
+        return attempt
+
+    def save(self, attempt_id, owner, positions):
+        """Store {question index: choice position} in the buffer"""
+        attempt = self.load(attempt_id, owner)
+        if attempt["result"] is not None:
+            raise AttemptError("Attempt already submitted", 409)
+        if time.time() > attempt["deadline"] + self.grace:
+            raise AttemptError("Time is up for this attempt", 409)
+        answers = list(attempt["answers"])
+        for i, position in positions.items():
+            answers[i] = position
+        attempt = dict(attempt, answers=answers)
+        self._store(attempt)
+        return attempt
+
+    def finish(self, attempt, result):
+        self._store(dict(attempt, result=result))
+
+    @staticmethod
+    def status(attempt):
+        """Client view of an attempt (the owner and answer positions stay on the server)"""
+        now = time.time()
+        return {
+            "attempt_id": attempt["id"],
+            "quiz_id": attempt["quiz_id"],
+            "started": attempt["started"],
+            "deadline": attempt["deadline"],
+            "time_left": max(0, int(attempt["deadline"] - now)),
+            "answered": sum(1 for position in attempt["answers"] if position != UNANSWERED),
+            "total": len(attempt["answers"]),
+            "result": attempt["result"],
+        }
+
+    @staticmethod
+    def elapsed(attempt):
+        """Seconds spent answering, capped at the time limit"""
+        return round(min(time.time(), attempt["deadline"]) - attempt["started"], 1)
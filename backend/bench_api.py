@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+API benchmark suite: drives the hot endpoints in-process against a synthetic dataset.
+
+The app runs in this process (FastAPI TestClient) on a fresh SQLite database holding the full
+seed catalogue plus --users users with --attempts quiz attempts, made by generate_dataset.py.
+Each scenario sends --requests requests from --concurrency threads and reports latency
+percentiles, throughput, error count and SQL queries per request (counted on the engine, averaged over the scenario).
+
+Scenarios: quiz, quiz_by_id, submit, user_subjects, user_stats, leaderboard, leaderboard_uncached,
+admin_users. The leaderboard is cached for every caller, so `leaderboard` measures cache hits;
+`leaderboard_uncached` clears the cached leaderboards before every request to measure the query
+and merge path.
+
+Usage:
+    python bench_api.py --users 500 --attempts 20000 --concurrency 8 --requests 300 --output bench.json
+    python bench_api.py --scenarios submit user_stats --compare bench.json   # flag regressions vs. a saved run
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from loadtest_workers import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = ("quiz", "quiz_by_id", "submit", "user_subjects", "user_stats", "leaderboard", "leaderboard_uncached", "admin_users")
+ADMIN_EMAIL = "bench-admin@codetech.local"
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine (all threads)"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        with self._lock:
+            self.count += 1
+
+def ensure_admin(main):
+    from passwords import hash_password
+    db = main.SessionLocal()
+    try:
+        if not main.get_user(db, ADMIN_EMAIL):
+            db.add(main.User(email=ADMIN_EMAIL, hashed_password=hash_password("bench-password"), name="Bench Admin", role="admin"))
+            db.commit()
+    finally:
+        db.close()
+
+def setup(args):
+    """Create the database and import the app; returns (main, dataset summary)"""
+    if not args.database:
+        args.database = os.path.join(tempfile.mkdtemp(prefix="codetech-bench-"), "bench.db")
+    fresh = not os.path.exists(args.database)
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.database}"
+    os.environ.setdefault("CODETECH_JOB_WORKERS", "0")
+    os.environ.setdefault("CODETECH_SKIP_BOOTSTRAP", "1")
+    os.environ.setdefault("CODETECH_RATE_LIMITS", "0")  # All benchmark traffic comes from one client
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+    from generate_dataset import generate
+    if fresh:
+        dataset = generate(args.users, args.attempts, seed=args.seed, domain="bench.codetech.local", log=lambda message: None)
+    else:
+        db = main.SessionLocal()
+        try:
+            dataset = {"users": db.query(main.User).filter(main.User.role == "user").count(),
+                       "activities": db.query(main.UserActivity).count(), "reused": args.database}
+        finally:
+            db.close()
+    ensure_admin(main)
+    return main, dataset
+
+def make_requests(main, scenario, rng, count):
+    """(method, path, kwargs) for `count` requests of a scenario"""
+    db = main.SessionLocal()
+    try:
+        quizzes = {q.id: (q.subject_id, q.level_id) for q in db.query(main.Quiz)}
+        answers = {}  # quiz_id -> {question_id: [choice texts]}
+        for quiz_id, question_id, text in db.query(main.Question.quiz_id, main.Choice.question_id, main.Choice.text).join(
+            main.Question, main.Question.id == main.Choice.question_id
+        ):
+            answers.setdefault(quiz_id, {}).setdefault(question_id, []).append(text)
+        users = [email for (email,) in db.query(main.User.email).filter(main.User.role == "user", main.User.deleted_at == None)]
+    finally:
+        db.close()
+    token = lambda email: {"Authorization": "Bearer " + main.create_access_token({"sub": email})}
+    admin = token(ADMIN_EMAIL)
+    quiz_ids = sorted(quizzes)
+    requests = []
+    for _ in range(count):
+        quiz_id = rng.choice(quiz_ids)
+        if scenario == "quiz":
+            requests.append(("GET", "/quiz/%d/%d" % quizzes[quiz_id], {}))
+        elif scenario == "quiz_by_id":
+            requests.append(("GET", f"/quiz/{quiz_id}", {}))
+        elif scenario == "submit":
+            body = {question_id: rng.choice(choices) for question_id, choices in answers.get(quiz_id, {}).items()}
+            requests.append(("POST", f"/quiz/{quiz_id}/submit", {"json": body, "headers": token(rng.choice(users))}))
+        elif scenario == "user_subjects":
+            requests.append(("GET", "/user/subjects", {"headers": token(rng.choice(users))}))
+        elif scenario == "user_stats":
+            requests.append(("GET", "/user/stats", {"headers": token(rng.choice(users))}))
+        elif scenario in ("leaderboard", "leaderboard_uncached"):
+            requests.append(("GET", "/leaderboard?period=" + rng.choice(["weekly", "monthly", "all-time"]), {}))
+        elif scenario == "admin_users":
+            requests.append(("GET", "/admin/users", {"headers": admin}))
+    return requests
+
+def run_scenario(client, counter, requests, concurrency, warmup, before=None):
+    """before(), if given, runs ahead of every request, outside the timing (e.g. to clear a cache)"""
+    def send(request):
+        method, path, kwargs = request
+        if before:
+            before()
+        start = time.perf_counter()
+        response = client.request(method, path, **kwargs)
+        return time.perf_counter() - start, response.status_code
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(send, requests[:warmup]))
+        queries_before = counter.count
+        start = time.perf_counter()
+        results = list(pool.map(send, requests[warmup:]))
+        elapsed = time.perf_counter() - start
+    queries = counter.count - queries_before
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "requests": len(results),
+        "errors": sum(1 for _, status in results if status >= 400),
+        "throughput_rps": len(results) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "queries_per_request": queries / len(results) if results else 0.0,
+    }
+
+def compare(report, baseline, threshold):
+    """Print changes against a previous report; returns the names of regressed scenarios"""
+    regressed = []
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        p95 = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps = result["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        queries = result["queries_per_request"] - before["queries_per_request"]
+        flag = p95 > threshold or rps < -threshold or queries > 0.5
+        if flag:
+            regressed.append(name)
+        print(f"{name:<20} p95 {p95:+7.1%}  rps {rps:+7.1%}  queries/req {queries:+6.1f}{'  REGRESSION' if flag else ''}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process API benchmark on a synthetic dataset")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--attempts", "--activities", dest="attempts", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42, help="random seed (dataset and request mix)")
+    parser.add_argument("--database", help="SQLite file to use; created and filled if missing (default: temp file)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="previous JSON report; exit 1 if a scenario regressed")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative p95/throughput change counted as a regression")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    main_module, dataset = setup(args)
+    from fastapi.testclient import TestClient
+    counter = QueryCounter(main_module.engine)
+    rng = random.Random(args.seed)
+    report = {
+        "config": {key: getattr(args, key) for key in ("users", "attempts", "concurrency", "requests", "warmup", "seed")},
+        "dataset": dataset,
+        "setup_s": time.perf_counter() - started,
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "results": {},
+    }
+    with TestClient(main_module.app) as client:
+        for scenario in args.scenarios:
+            requests = make_requests(main_module, scenario, rng, args.warmup + args.requests)
+            before = None
+            if scenario == "leaderboard_uncached":
+                leaderboard_keys = [f"leaderboard:{period}" for period in main_module.LEADERBOARD_PERIODS]
+                before = lambda: main_module.cache.delete(*leaderboard_keys)
+            result = run_scenario(client, counter, requests, args.concurrency, args.warmup, before)
+            report["results"][scenario] = result
+            print(f"{scenario:<20} p50={result['p50_ms']:7.1f}ms p95={result['p95_ms']:7.1f}ms p99={result['p99_ms']:7.1f}ms "
+                  f"rps={result['throughput_rps']:7.1f} queries/req={result['queries_per_request']:6.1f} errors={result['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    regressed = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(report, json.load(f), args.threshold)
+    if not args.output and not args.compare:
+        print(json.dumps(report, indent=2))
+    sys.exit(1 if regressed else 0)
+
+if __name__ == "__main__":
+    main()
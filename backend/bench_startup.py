@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark: reports import-to-ready latency of the API.
+
+Each run starts a fresh Python process (so nothing is warm in sys.modules) and measures:
+  - import_ms: time to `import main`
+  - ready_ms:  time from the start of the import until the lifespan startup hook has finished
+
+With --server, uvicorn is launched instead and ready_ms is the time until the first
+successful HTTP response.
+
+Usage:
+    python bench_startup.py [--runs 5] [--server] [--port 8765]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Executed in a child process; prints one JSON line with the timings
+IN_PROCESS_PROBE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t_import = time.perf_counter()
+async def _startup():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+t_ready = asyncio.run(_startup())
+print(json.dumps({"import_ms": (t_import - t0) * 1000, "ready_ms": (t_ready - t0) * 1000}))
+"""
+
+def run_in_process():
+    out = subprocess.run(
+        [sys.executable, "-c", IN_PROCESS_PROBE],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    # Bootstrap tasks may print; the timings are on the last line
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def run_server(port, timeout=60.0):
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - t0 < timeout:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.json", timeout=1)
+                return {"ready_ms": (time.perf_counter() - t0) * 1000}
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("server did not become ready in time")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def summarize(samples, key):
+    values = [s[key] for s in samples if key in s]
+    if not values:
+        return None
+    return {"min": min(values), "median": statistics.median(values), "max": max(values)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import-to-ready latency of the API")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--server", action="store_true", help="measure a real uvicorn process")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    samples = []
+    for i in range(args.runs):
+        sample = run_server(args.port) if args.server else run_in_process()
+        samples.append(sample)
+        print(f"run {i + 1}: " + ", ".join(f"{k}={v:.1f}" for k, v in sample.items()))
+
+    report = {"mode": "server" if args.server else "in-process", "runs": args.runs}
+    for key in ("import_ms", "ready_ms"):
+        stats = summarize(samples, key)
+        if stats:
+            report[key] = stats
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
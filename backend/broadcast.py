@@ -0,0 +1,87 @@
+# =============================================================================
+# CROSS-WORKER CACHE INVALIDATION (LOCAL BROADCAST)
+# =============================================================================
+# Worker processes on the same host share a small directory of "generation" files, one per
+# channel. publish() writes a new generation token; every worker compares the token it last
+# saw with the file contents (at most once per poll interval) and drops its local caches when
+# it changes. This needs no extra service, works under gunicorn and `uvicorn --workers`,
+# and is portable (no fcntl / signals).
+
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+DEFAULT_BROADCAST_DIR = os.path.join(tempfile.gettempdir(), "codetech-broadcast")
+
+class LocalBroadcast:
+    """Publishes and observes per-channel generation tokens through files in a shared directory"""
+
+    def __init__(self, directory=None, poll_interval=0.25):
+        self.directory = directory or os.environ.get("CODETECH_BROADCAST_DIR", DEFAULT_BROADCAST_DIR)
+        self.poll_interval = poll_interval  # Seconds between file reads per channel
+        self._seen = {}  # channel -> (token, last_checked_monotonic)
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, channel):
+        return os.path.join(self.directory, f"{channel}.gen")
+
+    def _read(self, channel):
+        try:
+            with open(self._path(channel), "r", encoding="ascii") as f:
+                return f.read().strip() or "0"
+        except FileNotFoundError:
+            return "0"
+
+    def publish(self, channel):
+        """Announce that data behind `channel` changed; returns the new generation token"""
+        token = f"{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        tmp_path = f"{self._path(channel)}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="ascii") as f:
+            f.write(token)
+        os.replace(tmp_path, self._path(channel))  # Atomic: readers see the old or new token
+        with self._lock:
+            self._seen[channel] = (token, time.monotonic())
+        return token
+
+    def generation(self, channel):
+        """Current generation token of `channel` (re-read from disk at most every poll_interval)"""
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(channel)
+            if seen and now - seen[1] < self.poll_interval:
+                return seen[0]
+        token = self._read(channel)
+        with self._lock:
+            self._seen[channel] = (token, now)
+        return token
+
+class GenerationCache:
+    """Process-local cache whose entries are valid only for the channel generation they were built in"""
+
+    def __init__(self, bus, channel):
+        self.bus = bus
+        self.channel = channel
+        self._generation = None
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, builder):
+        generation = self.bus.generation(self.channel)
+        with self._lock:
+            if generation != self._generation:
+                self._values = {}
+                self._generation = generation
+            if key in self._values:
+                return self._values[key]
+        value = builder()
+        with self._lock:
+            if generation == self._generation:
+                self._values[key] = value
+        return value
+
+    def invalidate(self):
+        """Drop this worker's entries and tell every other worker to drop theirs; returns the new generation"""
+        return self.bus.publish(self.channel)
@@ -0,0 +1,367 @@
+# =============================================================================
+# SHARED CACHE - PLUGGABLE BACKENDS WITH SINGLE-FLIGHT RECOMPUTE
+# =============================================================================
+# Cache() fronts one of two backends:
+#   - LocalLRUBackend: in-process LRU with per-key TTLs (default, and the fallback)
+#   - RedisBackend:    any server speaking the Redis protocol (RESP), selected with
+#                      CACHE_URL=redis://host:port/db; shared by every API instance
+# get_or_compute() adds stampede protection: only one caller per key recomputes a missing
+# value (per process via a local lock, across instances via a SET NX lock key), the
+# others wait for the result. If the Redis server is unreachable the local backend is
+# used instead, so a cache outage never fails a request.
+#
+# Values are stored as JSON by both backends, so they come back with JSON types whichever backend
+# served them: dict keys are strings ({1: "a"} reads back as {"1": "a"}), tuples are lists, and a
+# value read from the cache is a fresh copy that callers may modify.
+
+import json
+import logging
+import queue
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from applog import log_event
+
+MISS = object()  # Sentinel for "not in cache" (None is a valid cached value)
+
+class CacheBackend:
+    """Interface implemented by cache backends. TTLs are in seconds (None = no expiry)."""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def add(self, key, value, ttl=None):
+        """Set only if the key is absent; returns True if this call stored the value"""
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def delete_if(self, key, value):
+        """Delete key only if it still holds value; returns True if this call deleted it"""
+        raise NotImplementedError
+
+class LocalLRUBackend(CacheBackend):
+    """Thread-safe in-process LRU cache with per-key expiry. Values are kept as JSON text, like
+    RedisBackend, so both return the same types."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at or None, JSON text)
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if entry is None:
+                return MISS
+            self._data.move_to_end(key)
+            raw = entry[1]
+        return json.loads(raw)
+
+    def _store(self, key, raw, ttl):
+        self._data[key] = (time.monotonic() + ttl if ttl else None, raw)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def set(self, key, value, ttl=None):
+        raw = json.dumps(value)
+        with self._lock:
+            self._store(key, raw, ttl)
+
+    def add(self, key, value, ttl=None):
+        raw = json.dumps(value)
+        with self._lock:
+            if self._live(key, time.monotonic()) is not None:
+                return False
+            self._store(key, raw, ttl)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def delete_if(self, key, value):
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if entry is None or entry[1] != json.dumps(value):
+                return False
+            del self._data[key]
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class RedisError(Exception):
+    """Error reply from the server"""
+
+class RedisBackend(CacheBackend):
+    """Minimal RESP2 client (GET/SET/DEL) with a small connection pool. Values are stored as JSON."""
+
+    # Compare-and-delete in one step on the server, so a lock that expired and was taken over by
+    # another caller is never deleted by its previous holder
+    DELETE_IF = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end return 0"
+
+    def __init__(self, url, pool_size=8, timeout=1.0, prefix="codetech:"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self.prefix = prefix
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    # --- Connection handling ---
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        if self.password:
+            self._roundtrip(conn, ("AUTH", self.password))
+        if self.db:
+            self._roundtrip(conn, ("SELECT", self.db))
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn[0].close()
+
+    @staticmethod
+    def _encode(args):
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("connection closed by cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply(reader) for _ in range(length)]
+        raise ConnectionError(f"unexpected reply from cache server: {line!r}")
+
+    def _roundtrip(self, conn, args):
+        conn[0].sendall(self._encode(args))
+        return self._read_reply(conn[1])
+
+    def command(self, *args):
+        conn = self._acquire()
+        try:
+            reply = self._roundtrip(conn, args)
+        except RedisError:
+            self._release(conn)  # Error reply; the connection itself is still usable
+            raise
+        except (OSError, ConnectionError):
+            conn[0].close()
+            raise
+        self._release(conn)
+        return reply
+
+    # --- CacheBackend ---
+    def get(self, key):
+        raw = self.command("GET", self.prefix + key)
+        return MISS if raw is None else json.loads(raw)
+
+    def _set_args(self, key, value, ttl):
+        args = ["SET", self.prefix + key, json.dumps(value)]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        return args
+
+    def set(self, key, value, ttl=None):
+        self.command(*self._set_args(key, value, ttl))
+
+    def add(self, key, value, ttl=None):
+        return self.command(*self._set_args(key, value, ttl), "NX") == "OK"
+
+    def delete(self, *keys):
+        if keys:
+            self.command("DEL", *[self.prefix + key for key in keys])
+
+    def delete_if(self, key, value):
+        return self.command("EVAL", self.DELETE_IF, 1, self.prefix + key, json.dumps(value)) == 1
+
+class Cache:
+    """Cache front-end: stats, backend failover and single-flight get_or_compute()"""
+
+    def __init__(self, backend=None, fallback=None, lock_ttl=10.0, wait_interval=0.02, retry_after=5.0):
+        self.backend = backend or LocalLRUBackend()
+        self.fallback = fallback or (self.backend if isinstance(self.backend, LocalLRUBackend) else LocalLRUBackend())
+        self.lock_ttl = lock_ttl  # Max seconds another caller waits for a recompute in flight
+        self.wait_interval = wait_interval
+        self.retry_after = retry_after  # Seconds to stay on the fallback after a backend failure
+        self._down_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._flights = {}  # key -> [threading.Lock, callers holding or waiting on it]; one recompute per key per process
+        self._flights_lock = threading.Lock()
+
+    def _call(self, method, *args):
+        if self.backend is not self.fallback and time.monotonic() >= self._down_until:
+            try:
+                return getattr(self.backend, method)(*args)
+            except (OSError, ConnectionError, RedisError) as e:
+                self.errors += 1
+                self._down_until = time.monotonic() + self.retry_after
+                log_event("cache_backend_unavailable", level=logging.WARNING, error=str(e), fallback_seconds=self.retry_after)
+        return getattr(self.fallback, method)(*args)
+
+    def get(self, key):
+        value = self._call("get", key)
+        if value is MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def peek(self, key):
+        """get() for bookkeeping keys (flags, markers): not counted in the hit/miss stats"""
+        return self._call("get", key)
+
+    def set(self, key, value, ttl=None):
+        self._call("set", key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        return self._call("add", key, value, ttl)
+
+    def delete(self, *keys):
+        self._call("delete", *keys)
+
+    def delete_if(self, key, value):
+        return self._call("delete_if", key, value)
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @contextmanager
+    def _flight(self, key):
+        """Hold the key's process-wide recompute lock. The lock is dropped only when the last caller
+        holding or waiting on it leaves, so a caller arriving meanwhile queues on the same lock
+        instead of starting a second recompute."""
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = [threading.Lock(), 0]
+            flight[1] += 1
+        try:
+            with flight[0]:
+                yield
+        finally:
+            with self._flights_lock:
+                flight[1] -= 1
+                if not flight[1]:
+                    del self._flights[key]
+
+    def get_or_compute(self, key, ttl, compute):
+        """Return the cached value for key, or compute and store it; concurrent misses compute once"""
+        value = self.get(key)
+        if value is not MISS:
+            return value
+        with self._flight(key):
+            value = self._call("get", key)  # Filled in by the caller we waited for?
+            if value is not MISS:
+                self.hits += 1
+                return value
+            # Cross-instance single flight: whoever stores the lock key recomputes. The lock holds a
+            # token unique to this caller and is released only if it still holds that token, so a
+            # caller that timed out waiting (or whose lock expired) never releases someone else's.
+            lock_key = f"lock:{key}"
+            token = uuid.uuid4().hex
+            locked = self.add(lock_key, token, self.lock_ttl)
+            if not locked:
+                deadline = time.monotonic() + self.lock_ttl
+                while time.monotonic() < deadline:
+                    time.sleep(self.wait_interval)
+                    value = self._call("get", key)
+                    if value is not MISS:
+                        self.hits += 1
+                        return value
+            try:
+                value = compute()
+                self.set(key, value, ttl)
+            finally:
+                if locked:
+                    self.delete_if(lock_key, token)
+        return json.loads(json.dumps(value))  # The types every other caller reads back
+
+class CacheBroadcast:
+    """Invalidation bus stored in the shared cache, for instances on different hosts.
+    Same interface as broadcast.LocalBroadcast (publish / generation)."""
+
+    def __init__(self, cache, poll_interval=0.5):
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel):
+        token = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        self.cache.set(f"broadcast:{channel}", token)
+        with self._lock:
+            self._seen[channel] = (token, time.monotonic())
+        return token
+
+    def generation(self, channel):
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(channel)
+            if seen and now - seen[1] < self.poll_interval:
+                return seen[0]
+        token = self.cache._call("get", f"broadcast:{channel}")
+        token = "0" if token is MISS else token
+        with self._lock:
+            self._seen[channel] = (token, now)
+        return token
+
+def create_cache(url=None):
+    """Build a Cache from a URL: redis://host:port/db for a shared server, empty/"local" for in-process"""
+    if url and url.startswith("redis://"):
+        return Cache(RedisBackend(url))
+    return Cache(LocalLRUBackend())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Reproducible check of read-replica routing (REPLICA_URLS, see replicas.py).
+
+Runs the app in this process (FastAPI TestClient) on a fresh SQLite primary and a SQLite replica
+file copied from it. Nothing replicates into the copy, so after a quiz submit the two databases
+disagree on /total-students, and the answer shows which one served a read. Replica lag is set
+by writing the replica's heartbeat row directly before each lag check. Checks:
+
+  replica    with the replica caught up, anonymous reads are served by the replica
+  lag        with the replica more than REPLICA_MAX_LAG seconds behind, reads fall back to the
+             primary
+  sticky     after a user's own write, their reads go to the primary (others still read the
+             replica) until REPLICA_MAX_LAG + check interval seconds have passed
+  shared     the cached /leaderboard (shared by all users) is rebuilt for the writer, so it
+             shows their own submit at once, and the rebuilt entry is then served to others
+
+Exits with status 1 if any check fails.
+
+Usage:
+    python check_replicas.py
+    python check_replicas.py --keep     # keep the database files for inspection
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+PASSWORD = "replica-check-password"
+MAX_LAG = 1.0  # Short, so the sticky window (MAX_LAG + 1s check interval) expires quickly
+
+def setup(directory):
+    """Point the app at a primary and a replica file in `directory`; returns the main module"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'primary.db')}"
+    os.environ["REPLICA_URLS"] = f"sqlite:///{os.path.join(directory, 'replica.db')}"
+    os.environ["REPLICA_MAX_LAG"] = str(MAX_LAG)
+    os.environ["REPLICA_STICKY"] = "1"
+    os.environ.pop("SHARD_URLS", None)
+    os.environ.setdefault("CODETECH_JOB_WORKERS", "0")
+    os.environ.setdefault("CODETECH_SKIP_BOOTSTRAP", "1")
+    os.environ.setdefault("CODETECH_RATE_LIMITS", "0")  # All requests come from one client
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+    from replicas import heartbeat_metadata
+    from seed_main import seed_database
+    main.Base.metadata.create_all(bind=main.engine)
+    heartbeat_metadata.create_all(bind=main.engine)
+    with contextlib.redirect_stdout(open(os.devnull, "w")):  # Seeding progress
+        seed_database()
+    return main
+
+def copy_database(source, target):
+    """Consistent copy of a SQLite file (WAL included), standing in for a replica's initial sync"""
+    with contextlib.closing(sqlite3.connect(source)) as src, contextlib.closing(sqlite3.connect(target)) as dst:
+        src.backup(dst)
+
+def set_replica_lag(main, replica_file, seconds):
+    """Make the replica's heartbeat `seconds` old and let the router measure it"""
+    with contextlib.closing(sqlite3.connect(replica_file)) as conn:
+        conn.execute("UPDATE replica_heartbeat SET beat = ? WHERE id = 1", (time.time() - seconds,))
+        conn.commit()
+    return main.replica_router.check_lag()
+
+def main():
+    parser = argparse.ArgumentParser(description="Check replica routing, lag fallback and sticky reads with SQLite files")
+    parser.add_argument("--keep", action="store_true", help="keep the database files")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="codetech-replicas-")
+    primary_file = os.path.join(directory, "primary.db")
+    replica_file = os.path.join(directory, "replica.db")
+    failures = []
+
+    def check(ok, message):
+        print(f"{'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    try:
+        app_module = setup(directory)
+        from fastapi.testclient import TestClient
+        router = app_module.replica_router
+        check(router.enabled and len(router.replica_engines) == 1, "REPLICA_URLS configures one replica")
+
+        # The lag monitor thread is not started (no lifespan); check_lag() runs on demand instead
+        client = TestClient(app_module.app)
+        headers = {}
+        for name in ("writer", "bystander"):
+            email = f"replica-check-{name}@codetech.local"
+            client.post("/signup", json={"email": email, "password": PASSWORD, "name": f"Replica Check {name}"}).raise_for_status()
+            token = client.post("/login", data={"username": email, "password": PASSWORD}).json()["access_token"]
+            headers[name] = {"Authorization": f"Bearer {token}"}
+        router.check_lag()  # Writes the first heartbeat row, so the copy has one
+        copy_database(primary_file, replica_file)
+
+        def on_leaderboard(request_headers=None):
+            board = client.get("/leaderboard", headers=request_headers or {}).json()["data"]
+            return any(row["email"] == "replica-check-writer@codetech.local" for row in board)
+
+        # Cache the leaderboard before any submit, as another user's visit would
+        on_leaderboard()
+
+        # The writer submits a quiz: one active student on the primary, none on the replica copy
+        quiz = client.get("/quiz/1").json()
+        answers = {question["id"]: question["correct"] for question in quiz["questions"]}
+        client.post("/quiz/1/submit", json=answers, headers=headers["writer"]).raise_for_status()
+        write_time = time.monotonic()
+
+        def served_by(request_headers=None):
+            total = client.get("/total-students", headers=request_headers or {}).json()["totalStudents"]
+            return {0: "replica", 1: "primary"}.get(total, f"unexpected totalStudents={total}")
+
+        # --- Replica ---
+        lags = set_replica_lag(app_module, replica_file, 0)
+        check(router.healthy() == [0], f"caught-up replica is healthy (lag {lags[0]:.2f}s)")
+        check(served_by() == "replica", "anonymous read is served by the replica")
+
+        # --- Lag fallback ---
+        lags = set_replica_lag(app_module, replica_file, MAX_LAG + 5)
+        check(router.healthy() == [], f"replica {lags[0]:.1f}s behind (max {MAX_LAG}s) is skipped")
+        check(served_by() == "primary", "anonymous read falls back to the primary")
+        check(served_by(headers["bystander"]) == "primary", "authenticated read falls back to the primary")
+
+        # --- Sticky reads after a write ---
+        set_replica_lag(app_module, replica_file, 0)
+        check(router.is_sticky("replica-check-writer@codetech.local"), "submit marks the writer sticky")
+        check(served_by(headers["writer"]) == "primary", "writer's own read goes to the primary")
+        check(served_by(headers["bystander"]) == "replica", "another user's read still goes to the replica")
+
+        # --- Shared cached views ---
+        check(not on_leaderboard(headers["bystander"]), "bystander still gets the leaderboard cached before the submit")
+        check(on_leaderboard(headers["writer"]), "writer's /leaderboard is rebuilt and includes their submit")
+        check(on_leaderboard(headers["bystander"]), "the rebuilt leaderboard is then served to the bystander too")
+
+        time.sleep(max(0.0, write_time + router.sticky_seconds + 0.2 - time.monotonic()))
+        check(served_by(headers["writer"]) == "replica", f"writer reads the replica again after {router.sticky_seconds:.0f}s")
+    finally:
+        if args.keep:
+            print(f"Database files kept in {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if failures:
+        print(f"{len(failures)} check(s) failed", file=sys.stderr)
+        sys.exit(1)
+    print("All replica checks passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Reproducible check of sharded per-user tables (SHARD_URLS, see sharding.py).
+
+Runs the app in this process (FastAPI TestClient) on a fresh SQLite primary plus two SQLite
+shard files, signs up a few users and has user n submit one quiz in each of n levels, then checks:
+
+  routing    each user's completions and activity are on shard user_id % 2 only, never on the
+             primary or the other shard, and /user/stats reads them back from that shard
+  fan-out    /leaderboard and /total-students merge the rows of both shards
+
+Exits with status 1 if any check fails.
+
+Usage:
+    python check_sharding.py
+    python check_sharding.py --users 6 --keep     # keep the database files for inspection
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+PASSWORD = "shard-check-password"
+
+def setup(directory):
+    """Point the app at a primary and two shard files in `directory`; returns the main module"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'primary.db')}"
+    os.environ["SHARD_URLS"] = ",".join(f"sqlite:///{os.path.join(directory, f'shard{i}.db')}" for i in range(2))
+    os.environ.setdefault("CODETECH_JOB_WORKERS", "0")
+    os.environ.setdefault("CODETECH_SKIP_BOOTSTRAP", "1")
+    os.environ.setdefault("CODETECH_RATE_LIMITS", "0")  # All requests come from one client
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+    from seed_main import seed_database
+    main.Base.metadata.create_all(bind=main.engine)
+    main.shard_router.create_tables(main.Base.metadata)
+    with contextlib.redirect_stdout(open(os.devnull, "w")):  # Seeding progress
+        seed_database()
+    return main
+
+def level_quizzes(main):
+    """First quiz of every level: each submit below then adds one activity row"""
+    db = main.SessionLocal()
+    try:
+        first = {}
+        for quiz in db.query(main.Quiz).order_by(main.Quiz.id):
+            first.setdefault((quiz.subject_id, quiz.level_id), quiz.id)
+        return list(first.values())
+    finally:
+        db.close()
+
+def rows_per_database(main, user_id):
+    """{database name: (completions, activity rows)} for one user"""
+    sessions = {"primary": main.SessionLocal()}
+    sessions.update({f"shard{i}": maker() for i, maker in enumerate(main.shard_router.sessionmakers)})
+    try:
+        return {
+            name: (
+                session.query(main.UserQuizCompletion).filter_by(user_id=user_id).count(),
+                session.query(main.UserActivity).filter_by(user_id=user_id).count(),
+            )
+            for name, session in sessions.items()
+        }
+    finally:
+        for session in sessions.values():
+            session.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Check per-user routing and fan-out over two SQLite shards")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--keep", action="store_true", help="keep the database files")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="codetech-shards-")
+    failures = []
+
+    def check(ok, message):
+        print(f"{'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    try:
+        app_module = setup(directory)
+        from fastapi.testclient import TestClient
+        quizzes = level_quizzes(app_module)
+        if len(quizzes) < args.users:
+            parser.error(f"the seed catalogue has {len(quizzes)} levels; use --users {len(quizzes)} or fewer")
+
+        with TestClient(app_module.app) as client:
+            users = []  # (user_id, email, quizzes submitted, auth headers)
+            for n in range(1, args.users + 1):
+                email = f"shard-check-{n}@codetech.local"
+                user = client.post("/signup", json={"email": email, "password": PASSWORD, "name": f"Shard Check {n}"}).json()
+                token = client.post("/login", data={"username": email, "password": PASSWORD}).json()["access_token"]
+                headers = {"Authorization": f"Bearer {token}"}
+                for quiz_id in quizzes[:n]:
+                    quiz = client.get(f"/quiz/{quiz_id}").json()
+                    answers = {question["id"]: question["correct"] for question in quiz["questions"]}
+                    client.post(f"/quiz/{quiz_id}/submit", json=answers, headers=headers).raise_for_status()
+                users.append((user["id"], email, n, headers))
+
+            # --- Routing ---
+            for user_id, email, n, headers in users:
+                home = f"shard{user_id % 2}"
+                counts = rows_per_database(app_module, user_id)
+                check(counts[home] == (n, n) and all(counts[name] == (0, 0) for name in counts if name != home),
+                      f"user {user_id}: {n} completions/activities on {home} only {counts}")
+                stats = client.get("/user/stats", headers=headers).json()
+                check(stats.get("totalCompleted") == n, f"user {user_id}: /user/stats reads {stats.get('totalCompleted')} completions from {home}")
+            check(len({user_id % 2 for user_id, _, _, _ in users}) == 2, "users are spread over both shards")
+
+            # --- Fan-out ---
+            app_module.cache.delete(*[f"leaderboard:{period}" for period in app_module.LEADERBOARD_PERIODS])
+            board = client.get("/leaderboard").json()["data"]
+            expected = [(email, n) for _, email, n, _ in sorted(users, key=lambda user: -user[2])]
+            check([(row["email"], row["quizzes"]) for row in board] == expected,
+                  f"/leaderboard merges both shards in score order {[(row['email'], row['quizzes']) for row in board]}")
+            total = client.get("/total-students").json()["totalStudents"]
+            check(total == len(users), f"/total-students counts active users on both shards ({total})")
+    finally:
+        if args.keep:
+            print(f"Database files kept in {directory}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if failures:
+        print(f"{len(failures)} check(s) failed", file=sys.stderr)
+        sys.exit(1)
+    print("All shard checks passed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for scale testing.
+
+Adds users with realistic learning histories to the database named by DATABASE_URL (SQLite or
+MySQL; per-user tables go to their shard when SHARD_URLS is set):
+  - engagement follows a power law: most users do a handful of quizzes, a few do hundreds,
+    and a share of accounts never becomes active
+  - signups grow over the period, and activity follows weekly and daily cycles
+    (busier on weekdays and evenings)
+  - each user studies one to three subjects, picked by popularity, and works through the
+    quizzes in level order, with retries. The rows are what the submit endpoints would have left
+    after that history: one activity row per (user, subject, level) holding the latest attempt
+    (log_user_activity updates it in place), plus completions, level progress and subject progress.
+
+--attempts counts simulated quiz attempts, so there are fewer activity rows than attempts.
+Rows are written with multi-row inserts in batches (1M attempts: well under a minute on SQLite).
+The seed catalogue is imported first if the database has no quizzes. Generated users share
+one password (--password) and use the --domain email domain; running again adds more users.
+
+Usage:
+    DATABASE_URL=sqlite:///scale.db python generate_dataset.py --users 50000 --attempts 1000000
+    python generate_dataset.py --users 2000 --attempts 50000 --days 90 --seed 7
+"""
+import argparse
+import math
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WEEKDAY_WEIGHTS = (1.0, 1.0, 0.95, 0.9, 0.75, 0.45, 0.55)  # Monday..Sunday
+HOUR_WEIGHTS = (  # 00..23 UTC
+    0.2, 0.1, 0.05, 0.05, 0.05, 0.1, 0.3, 0.5, 0.8, 1.0, 1.0, 0.9,
+    0.8, 0.9, 1.0, 1.0, 1.1, 1.3, 1.6, 1.9, 2.0, 1.7, 1.1, 0.5,
+)
+INACTIVE_SHARE = 0.2  # Accounts that never complete a quiz
+ENGAGEMENT_ALPHA = 1.3  # Pareto shape of per-user activity; lower = heavier tail
+RETRY_SHARE = 0.25  # Attempts that repeat an already completed quiz
+_PEAK_WEIGHT = max(WEEKDAY_WEIGHTS) * max(HOUR_WEIGHTS)
+
+def engagement_counts(users, attempts, rng):
+    """Quiz attempts per user: zero for inactive accounts, Pareto-distributed for the rest, summing to `attempts`"""
+    weights = [0.0 if rng.random() < INACTIVE_SHARE else rng.paretovariate(ENGAGEMENT_ALPHA) for _ in range(users)]
+    total = sum(weights) or 1.0
+    counts = [int(weight / total * attempts) for weight in weights]
+    # Hand out the rounding remainder to active users, heaviest first
+    active = sorted((i for i, weight in enumerate(weights) if weight), key=lambda i: -weights[i]) or list(range(users))
+    for i in range(attempts - sum(counts)):
+        counts[active[i % len(active)]] += 1
+    return counts
+
+def activity_times(count, signup, now, rng):
+    """`count` sorted timestamps between signup and now, following the weekly and daily cycles"""
+    span = (now - signup).total_seconds()
+    times = []
+    while len(times) < count:
+        moment = signup + timedelta(seconds=int(rng.random() * span))
+        # Rejection sampling: keep the moment with probability proportional to its weekday/hour weight
+        if rng.random() * _PEAK_WEIGHT <= WEEKDAY_WEIGHTS[moment.weekday()] * HOUR_WEIGHTS[moment.hour]:
+            times.append(moment)
+    times.sort()
+    return times
+
+def load_catalogue(main, db):
+    """(quizzes per subject in study order (level, then quiz), quiz ids per level)"""
+    levels = {level.id: (level.subject_id, level.level_number or 0) for level in db.query(main.Level)}
+    quizzes = [
+        (quiz.id, quiz.subject_id, quiz.level_id, quiz.title)
+        for quiz in db.query(main.Quiz)
+        if quiz.level_id in levels
+    ]
+    quizzes.sort(key=lambda q: (q[1], levels[q[2]][1], q[2], q[0]))
+    by_subject = {}
+    for quiz in quizzes:
+        by_subject.setdefault(quiz[1], []).append(quiz)
+    level_quizzes = {}
+    for quiz_id, _, level_id, _ in quizzes:
+        level_quizzes.setdefault(level_id, set()).add(quiz_id)
+    return by_subject, level_quizzes
+
+class BatchWriter:
+    """Buffers rows per (engine, table) and writes them with multi-row inserts"""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.written = {}
+
+    def add(self, engine, table, row):
+        buffer = self.buffers.setdefault((engine, table), [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(engine, table)
+
+    def flush(self, engine=None, table=None):
+        from sqlalchemy import insert
+        keys = [(engine, table)] if engine is not None else list(self.buffers)
+        for key in keys:
+            rows = self.buffers.get(key)
+            if rows:
+                with key[0].begin() as conn:
+                    conn.execute(insert(key[1]), rows)
+                self.written[key[1].name] = self.written.get(key[1].name, 0) + len(rows)
+                self.buffers[key] = []
+
+def generate(users=1000, attempts=20000, days=180, seed=42, domain="synthetic.codetech.local",
+             password="synthetic-password", batch_size=10000, log=print):
+    """Add `users` users with `attempts` quiz attempts between them to the configured database; returns row counts"""
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+    from passwords import hash_password
+    from sqlalchemy import insert
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    main.Base.metadata.create_all(bind=main.engine)
+    if not main.shard_router.single:
+        main.shard_router.create_tables(main.Base.metadata)
+    db = main.SessionLocal()
+    try:
+        if not db.query(main.Quiz).first():
+            from seed_main import seed_database
+            seed_database(db)
+        by_subject, level_quizzes = load_catalogue(main, db)
+        subject_ids = sorted(by_subject)
+        subject_weights = [1.0 / (rank + 1) for rank in range(len(subject_ids))]  # Zipf popularity
+        rng.shuffle(subject_ids)
+        # Continue after the highest userN already used, tombstoned ("deleted:{id}:userN@...") included
+        pattern = re.compile(rf"(?:^|:)user(\d+)@{re.escape(domain)}$")
+        used = [pattern.search(email) for (email,) in db.query(main.User.email).filter(main.User.email.like(f"%user%@{domain}"))]
+        first_index = max((int(match.group(1)) + 1 for match in used if match), default=0)
+    finally:
+        db.close()
+
+    # --- Users ---
+    now = datetime.utcnow().replace(microsecond=0)
+    start = now - timedelta(days=days)
+    hashed = hash_password(password)
+    emails = [f"user{first_index + i}@{domain}" for i in range(users)]
+    with main.engine.begin() as conn:
+        for offset in range(0, users, batch_size):
+            conn.execute(insert(main.User), [
+                {"email": email, "hashed_password": hashed, "name": f"Synthetic User {first_index + offset + i}", "role": "user"}
+                for i, email in enumerate(emails[offset:offset + batch_size])
+            ])
+    db = main.SessionLocal()
+    try:
+        user_ids = dict(db.query(main.User.email, main.User.id).filter(main.User.email.like(f"%@{domain}")))
+    finally:
+        db.close()
+    log(f"Inserted {users} users ({time.perf_counter() - started:.1f}s)")
+
+    # --- Histories ---
+    writer = BatchWriter(batch_size)
+    counts = engagement_counts(users, attempts, rng)
+    shard_engine = lambda user_id: main.shard_router.engines[main.shard_router.shard_for(user_id)]
+    tables = {name: main.Base.metadata.tables[name] for name in
+              ("user_activity", "user_quiz_completion", "user_quiz_progress", "user_progress")}
+    for index, (email, count) in enumerate(zip(emails, counts)):
+        if not count:
+            continue
+        user_id = user_ids[email]
+        engine = shard_engine(user_id)
+        signup = start + timedelta(days=days * math.sqrt(rng.random()))  # Signups grow over the period
+        skill = rng.betavariate(5, 2) * 100
+        subjects = set(rng.choices(subject_ids, weights=subject_weights, k=rng.choice((1, 1, 1, 2, 2, 3))))
+        queues = {subject_id: list(by_subject[subject_id]) for subject_id in subjects}
+        completed = {}  # quiz_id -> (subject_id, level_id, title)
+        latest = {}  # (subject_id, level_id) -> activity row of the latest attempt
+        for moment in activity_times(count, signup, now, rng):
+            open_subjects = [subject_id for subject_id, queue in queues.items() if queue]
+            if completed and (not open_subjects or rng.random() < RETRY_SHARE):
+                quiz_id = rng.choice(list(completed))
+                subject_id, level_id, title = completed[quiz_id]
+                score = min(100, int(rng.gauss(skill + 10, 12)))
+            else:
+                if not open_subjects:
+                    break
+                quiz_id, subject_id, level_id, title = queues[rng.choice(open_subjects)].pop(0)
+                completed[quiz_id] = (subject_id, level_id, title)
+                score = int(rng.gauss(skill, 15))
+            latest[(subject_id, level_id)] = {
+                "user_id": user_id, "subject_id": subject_id, "level_id": level_id,
+                "action": f"Completed Quiz: {title}", "timestamp": moment.isoformat(),
+                "score": max(0, min(100, score)),
+            }
+        # Rows as the submit endpoints would have left them
+        for row in latest.values():
+            writer.add(engine, tables["user_activity"], row)
+        done_by_subject = {}
+        for quiz_id, (subject_id, level_id, _) in completed.items():
+            writer.add(engine, tables["user_quiz_completion"], {"user_id": user_id, "quiz_id": quiz_id, "completed": True})
+            done_by_subject[subject_id] = done_by_subject.get(subject_id, 0) + 1
+        for subject_id, level_id in {(subject_id, level_id) for subject_id, level_id, _ in completed.values()}:
+            if level_quizzes[level_id] <= completed.keys():
+                writer.add(engine, tables["user_quiz_progress"], {"user_id": user_id, "subject_id": subject_id, "level_id": level_id, "completed": 1})
+        for subject_id, done in done_by_subject.items():
+            total = len(by_subject[subject_id])
+            writer.add(main.engine, tables["user_progress"], {
+                "user_id": user_id, "subject_id": subject_id, "completed_quizzes": done,
+                "total_quizzes": total, "progress": int(done / total * 100),
+            })
+        if (index + 1) % 10000 == 0:
+            log(f"  {index + 1}/{users} users, {writer.written.get('user_activity', 0)} activity rows ({time.perf_counter() - started:.1f}s)")
+    writer.flush()
+    summary = {"users": users, "attempts": sum(counts), **writer.written, "seconds": round(time.perf_counter() - started, 1)}
+    log(f"Done: {summary}")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic users and learning history")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--attempts", "--activities", dest="attempts", type=int, default=200000,
+                        help="number of simulated quiz attempts (one activity row is kept per user and level)")
+    parser.add_argument("--days", type=int, default=180, help="length of the history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--domain", default="synthetic.codetech.local", help="email domain of the generated users")
+    parser.add_argument("--password", default="synthetic-password", help="password of every generated user")
+    parser.add_argument("--batch-size", type=int, default=10000, help="rows per multi-row insert")
+    args = parser.parse_args()
+    generate(args.users, args.attempts, args.days, args.seed, args.domain, args.password, args.batch_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# =============================================================================
+# GUNICORN CONFIGURATION - MULTI-WORKER DEPLOYMENT
+# =============================================================================
+# Run with:  gunicorn -c gunicorn.conf.py main:app
+#
+# Durable state lives in the database (DATABASE_URL). Short-lived shared state does not: quiz
+# attempt buffers, idempotency keys and rate-limit buckets live in the cache (cache.py), which is
+# per-process unless CACHE_URL points every worker at one cache server. Without it an attempt
+# started on one worker is unknown to the others and retried submits can be recorded twice, so
+# more than one worker requires CACHE_URL. CODETECH_ALLOW_LOCAL_CACHE=1 overrides the check for
+# read-only benchmarks (loadtest_workers.py).
+# Catalogue caches are invalidated through the local broadcast directory (CODETECH_BROADCAST_DIR,
+# see broadcast.py). One-time bootstrap tasks run once in the master before workers are forked.
+
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+timeout = int(os.environ.get("WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+def on_starting(server):
+    if server.cfg.workers > 1 and not os.environ.get("CACHE_URL"):
+        if os.environ.get("CODETECH_ALLOW_LOCAL_CACHE") != "1":
+            raise RuntimeError(
+                f"{server.cfg.workers} workers need a shared cache: set CACHE_URL=redis://host:port/db "
+                "(or CODETECH_ALLOW_LOCAL_CACHE=1 for read-only benchmarks)"
+            )
+        server.log.warning("CACHE_URL is not set: attempts and idempotency keys are per worker")
+    # Workers inherit this environment, so their lifespan hook skips the bootstrap entirely
+    os.environ["CODETECH_SKIP_BOOTSTRAP"] = "1"
+    import main
+    main.run_bootstrap_tasks()
+    # Never share pooled connections across fork()
+    main.engine.dispose()
@@ -0,0 +1,77 @@
+# =============================================================================
+# IDEMPOTENT REQUESTS - DEDUP KEYS IN THE SHARED CACHE
+# =============================================================================
+# Clients send an Idempotency-Key header (one key per logical action, e.g. one quiz attempt).
+# The first request with a key claims it in the shared cache and runs; its result is stored for
+# `ttl` seconds. Repeats with the same key get that stored result without running again. A repeat
+# that arrives while the first is still running waits for it (up to `wait` seconds).
+#
+# A key is tied to its request's fingerprint: reusing a key for a different request (other quiz,
+# other answers) is an error instead of silently returning the wrong result. Keys live in the
+# shared cache (cache.py), so with CACHE_URL they are deduplicated across instances.
+
+import hashlib
+import json
+import time
+
+from cache import MISS
+
+class IdempotencyError(Exception):
+    """Key reused for a different request, or still in progress after waiting"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+def fingerprint(*parts):
+    """Stable hash of JSON-serializable request parts"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+class IdempotencyStore:
+    def __init__(self, cache, ttl=600, pending_ttl=30, wait=5.0, poll_interval=0.05, prefix="idempotency"):
+        self.cache = cache
+        self.ttl = ttl  # Seconds a result is replayed for
+        self.pending_ttl = pending_ttl  # Claim expiry, in case the first request's process dies
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+
+    def claim(self, key, request_fingerprint, wait=None):
+        """(True, None) if this call claimed the key, or (False, result) if it is already done.
+        Raises IdempotencyError for a different request, or one still in progress after `wait`."""
+        slot = f"{self.prefix}:{key}"
+        deadline = time.monotonic() + (self.wait if wait is None else wait)
+        while True:
+            if self.cache.add(slot, {"state": "pending", "fingerprint": request_fingerprint}, self.pending_ttl):
+                return True, None
+            entry = self.cache.peek(slot)
+            if entry is MISS:
+                continue  # Expired or released between add() and peek(): claim again
+            if entry.get("fingerprint") != request_fingerprint:
+                raise IdempotencyError("Idempotency-Key was already used for a different request", 422)
+            if entry.get("state") == "done":
+                return False, entry["result"]
+            if time.monotonic() >= deadline:
+                raise IdempotencyError("A request with this Idempotency-Key is still in progress", 409)
+            time.sleep(self.poll_interval)
+
+    def complete(self, key, request_fingerprint, result):
+        """Store the result of a claimed key, to be replayed for `ttl` seconds"""
+        self.cache.set(f"{self.prefix}:{key}", {"state": "done", "fingerprint": request_fingerprint, "result": result}, self.ttl)
+
+    def release(self, key):
+        """Give up a claim (the request failed), so it can be retried with the same key"""
+        self.cache.delete(f"{self.prefix}:{key}")
+
+    def run(self, key, request_fingerprint, compute):
+        """(result, replayed): compute() once per key; repeats get the stored result"""
+        claimed, result = self.claim(key, request_fingerprint)
+        if not claimed:
+            return result, True
+        try:
+            result = compute()
+        except Exception:
+            self.release(key)
+            raise
+        self.complete(key, request_fingerprint, result)
+        return result, False
@@ -1,6 +1,8 @@
-import mysql.connector
+import os
 
-# --- CONFIGURE THESE ---
+from storage import DEFAULT_DATABASE_URL, is_sqlite
+
+# --- CONFIGURE THESE --- (MySQL; with DATABASE_URL=sqlite:///... the tables are created from the models)
 MYSQL_HOST = 'localhost'
 MYSQL_USER = 'root'  # or your MySQL user
 MYSQL_PASSWORD = 'adeodatus'
@@ -21,9 +23,15 @@ def create_tables(cursor):
         name VARCHAR(255),
         profile_picture VARCHAR(255),
         bio TEXT,
-        role VARCHAR(255) DEFAULT 'user'
+        role VARCHAR(255) DEFAULT 'user',
+        deleted_at VARCHAR(64) NULL,
+        INDEX ix_users_deleted_at (deleted_at)
     )
     """)
+    # users.deleted_at was added after the first release; add it to existing databases
+    cursor.execute("SHOW COLUMNS FROM users LIKE 'deleted_at'")
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE users ADD COLUMN deleted_at VARCHAR(64) NULL, ADD INDEX ix_users_deleted_at (deleted_at)")
     # subjects
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS subjects (
@@ -73,6 +81,15 @@ def create_tables(cursor):
         FOREIGN KEY (question_id) REFERENCES questions(id)
     )
     """)
+    # question_explanations (side store for feedback content, loaded lazily)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS question_explanations (
+        question_id INT PRIMARY KEY,
+        explanation TEXT,
+        resources TEXT,
+        FOREIGN KEY (question_id) REFERENCES questions(id)
+    )
+    """)
     # user_progress
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS user_progress (
@@ -125,9 +142,46 @@ def create_tables(cursor):
         FOREIGN KEY (quiz_id) REFERENCES quizzes(id)
     )
     """)
+    # bootstrap_tasks (one-time startup tasks already run for this deployment)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS bootstrap_tasks (
+        name VARCHAR(255) PRIMARY KEY,
+        started_at VARCHAR(64),
+        completed_at VARCHAR(64)
+    )
+    """)
+    # jobs (background admin jobs, see jobs.py)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id VARCHAR(32) PRIMARY KEY,
+        kind VARCHAR(64),
+        params TEXT,
+        status VARCHAR(16),
+        progress INT DEFAULT 0,
+        checkpoint TEXT,
+        error TEXT,
+        cancel_requested BOOLEAN DEFAULT FALSE,
+        requested_by INT,
+        claimed_by VARCHAR(32),
+        created_at VARCHAR(32),
+        started_at VARCHAR(32),
+        heartbeat_at VARCHAR(32),
+        finished_at VARCHAR(32),
+        INDEX ix_jobs_kind (kind),
+        INDEX ix_jobs_status (status)
+    )
+    """)
     print("All tables ensured.")
 
-def main():
+def create_sqlite_database():
+    """SQLite: create every table from the SQLAlchemy models (the file is created if missing)"""
+    from main import Base, engine
+    Base.metadata.create_all(bind=engine)
+    print("All tables ensured.")
+
+def create_mysql_database():
+    import mysql.connector
+
     # Debug output
     print("DEBUG: Connecting to MySQL with the following credentials:")
     print("  Host:", MYSQL_HOST)
@@ -148,18 +202,19 @@ def main():
     print("Tables in database:", cursor.fetchall())
     cursor.close()
     conn.close()
+
+def main():
+    database_url = os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL)
+    if is_sqlite(database_url):
+        print(f"Using SQLite database: {database_url}")
+        create_sqlite_database()
+    else:
+        create_mysql_database()
     print("Database and schema setup complete!")
 
     # Now seed the database
     from seed_main import seed_database
-    conn = mysql.connector.connect(
-        host=MYSQL_HOST,
-        user=MYSQL_USER,
-        password=MYSQL_PASSWORD,
-        database=DB_NAME
-    )
-    seed_database(conn)
-    conn.close()
+    seed_database()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
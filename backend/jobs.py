@@ -0,0 +1,261 @@
+# =============================================================================
+# BACKGROUND JOB RUNNER - LONG ADMIN MAINTENANCE OPERATIONS
+# =============================================================================
+# Jobs are rows in a jobs table, so they survive restarts and are visible to every worker.
+# Each job kind has a step handler that does one chunk of work:
+#
+#     handler(db, params, checkpoint) -> (checkpoint, progress, done)
+#
+# The runner commits the handler's changes on the primary database together with the new
+# checkpoint, and a job that stops for any reason (restart, crash, lost lease) resumes after the
+# last committed checkpoint. Writes a handler makes through shard_sessions(db) (per-user tables on
+# SHARD_URLS shards) commit on the shards first, when that block ends, and are not atomic with the
+# checkpoint: a job stopped in between repeats the chunk on resume. Steps must therefore be
+# idempotent, so running a chunk twice leaves the same result as running it once.
+# A process runs at most max_workers jobs at a time; jobs are claimed with a conditional
+# UPDATE, so with several worker processes each job still runs in exactly one of them.
+# Cancellation is checked between chunks.
+
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, and_, func
+
+from applog import log_event
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+def _now():
+    return datetime.utcnow().isoformat()
+
+class JobRunner:
+    """In-process runner for jobs stored through `job_model` (see main.Job)"""
+
+    def __init__(self, session_factory, job_model, max_workers=2, poll_interval=1.0, lease_timeout=300.0):
+        self.session_factory = session_factory
+        self.Job = job_model
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval  # Seconds between looks for queued jobs
+        self.lease_timeout = lease_timeout  # A running job without a heartbeat for this long is reclaimed
+        self.handlers = {}
+        self.worker_id = uuid.uuid4().hex
+        self._executor = None
+        self._dispatcher = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def register(self, kind):
+        """Decorator registering the step handler for a job kind"""
+        def decorator(handler):
+            self.handlers[kind] = handler
+            return handler
+        return decorator
+
+    # --- Status API ---
+    def to_dict(self, job):
+        return {
+            "job_id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "progress": job.progress,
+            "params": json.loads(job.params or "{}"),
+            "checkpoint": json.loads(job.checkpoint) if job.checkpoint else None,
+            "error": job.error,
+            "cancel_requested": bool(job.cancel_requested),
+            "requested_by": job.requested_by,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+
+    def submit(self, kind, params=None, requested_by=None):
+        """Queue a job; returns its status dict"""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        db = self.session_factory()
+        try:
+            job = self.Job(
+                id=uuid.uuid4().hex,
+                kind=kind,
+                params=json.dumps(params or {}),
+                status="queued",
+                progress=0,
+                cancel_requested=False,
+                requested_by=requested_by,
+                created_at=_now(),
+            )
+            db.add(job)
+            db.commit()
+            result = self.to_dict(job)
+        finally:
+            db.close()
+        self._wakeup.set()
+        return result
+
+    def get(self, job_id):
+        db = self.session_factory()
+        try:
+            job = db.get(self.Job, job_id)
+            return self.to_dict(job) if job else None
+        finally:
+            db.close()
+
+    def list(self, status=None, kind=None, limit=50):
+        db = self.session_factory()
+        try:
+            query = db.query(self.Job)
+            if status:
+                query = query.filter(self.Job.status == status)
+            if kind:
+                query = query.filter(self.Job.kind == kind)
+            return [self.to_dict(job) for job in query.order_by(self.Job.created_at.desc()).limit(limit)]
+        finally:
+            db.close()
+
+    def cancel(self, job_id):
+        """Cancel a queued job now, or ask a running one to stop after its current chunk.
+        Returns the status dict, or None if there is no such job."""
+        db = self.session_factory()
+        try:
+            job = db.get(self.Job, job_id)
+            if job is None:
+                return None
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = _now()
+            elif job.status == "running":
+                job.cancel_requested = True
+            db.commit()
+            return self.to_dict(job)
+        finally:
+            db.close()
+
+    # --- Lifecycle ---
+    def start(self):
+        if self.max_workers <= 0 or self._dispatcher is not None:
+            return
+        self._stopping.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="job-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def stop(self, wait=True):
+        """Stop claiming jobs; running jobs are re-queued after their current chunk"""
+        if self._dispatcher is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=wait)
+        self._dispatcher = None
+        self._executor = None
+
+    # --- Dispatching ---
+    def _dispatch_loop(self):
+        while not self._stopping.is_set():
+            try:
+                while self._free_slots() and not self._stopping.is_set():
+                    job_id = self._claim_next()
+                    if job_id is None:
+                        break
+                    with self._lock:
+                        self._active += 1
+                    self._executor.submit(self._run, job_id)
+            except Exception as e:
+                log_event("job_dispatcher_error", level=logging.ERROR, error=str(e))
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _free_slots(self):
+        with self._lock:
+            return self._active < self.max_workers
+
+    def _claim_next(self):
+        """Claim the oldest queued job (or one whose runner stopped heartbeating); returns its id"""
+        Job = self.Job
+        stale_before = (datetime.utcnow() - timedelta(seconds=self.lease_timeout)).isoformat()
+        claimable = or_(Job.status == "queued", and_(Job.status == "running", Job.heartbeat_at < stale_before))
+        db = self.session_factory()
+        try:
+            candidates = [
+                job_id for (job_id,) in db.query(Job.id)
+                .filter(claimable, Job.kind.in_(list(self.handlers)))
+                .order_by(Job.created_at).limit(self.max_workers)
+            ]
+            for job_id in candidates:
+                now = _now()
+                claimed = db.query(Job).filter(Job.id == job_id, claimable).update(
+                    {"status": "running", "claimed_by": self.worker_id, "heartbeat_at": now,
+                     "started_at": func.coalesce(Job.started_at, now)},
+                    synchronize_session=False,
+                )
+                db.commit()
+                if claimed:
+                    return job_id
+            return None
+        finally:
+            db.close()
+
+    def _run(self, job_id):
+        try:
+            while True:
+                if not self._step(job_id):
+                    break
+        except Exception as e:
+            log_event("job_crashed", level=logging.ERROR, job_id=job_id, error=str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+            self._wakeup.set()
+
+    def _step(self, job_id):
+        """Run one chunk of a claimed job; returns True if there is more to do"""
+        Job = self.Job
+        db = self.session_factory()
+        try:
+            job = db.get(Job, job_id)
+            if job is None or job.claimed_by != self.worker_id or job.status != "running":
+                return False  # Lease lost to another runner
+            if job.cancel_requested:
+                self._finish(db, job_id, {"status": "cancelled"})
+                return False
+            if self._stopping.is_set():
+                self._finish(db, job_id, {"status": "queued", "finished_at": None})  # Resume elsewhere / after restart
+                return False
+            handler = self.handlers[job.kind]
+            params = json.loads(job.params or "{}")
+            checkpoint = json.loads(job.checkpoint) if job.checkpoint else None
+            try:
+                checkpoint, progress, done = handler(db, params, checkpoint)
+            except Exception as e:
+                db.rollback()
+                log_event("job_failed", level=logging.WARNING, job_id=job_id, kind=job.kind, error=str(e))
+                self._finish(db, job_id, {"status": "failed", "error": str(e)})
+                return False
+            values = {"checkpoint": json.dumps(checkpoint), "progress": progress, "heartbeat_at": _now()}
+            if done:
+                values.update({"status": "completed", "progress": 100, "finished_at": _now()})
+            # Checkpoint commits with the chunk's changes, and only while we still hold the lease
+            updated = db.query(Job).filter(Job.id == job_id, Job.claimed_by == self.worker_id).update(
+                values, synchronize_session=False
+            )
+            if not updated:
+                db.rollback()
+                return False
+            db.commit()
+            return not done
+        finally:
+            db.close()
+
+    def _finish(self, db, job_id, values):
+        values = {"finished_at": _now(), "claimed_by": None, **values}
+        db.query(self.Job).filter(self.Job.id == job_id, self.Job.claimed_by == self.worker_id).update(
+            values, synchronize_session=False
+        )
+        db.commit()
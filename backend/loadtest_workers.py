@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Multi-worker load test: measures throughput of the API at several worker counts.
+
+For every worker count the server is started (uvicorn --workers N, or gunicorn with
+gunicorn.conf.py), driven for a fixed duration by client *processes* (so the load
+generator itself is not limited by the GIL), then stopped. The report shows requests
+per second and the scaling efficiency relative to the first worker count (rps per worker
+divided by the baseline's). The run fails (exit status 1) if any efficiency is below
+--min-efficiency, i.e. if throughput does not grow near-linearly with workers. Worker
+counts above the CPU count cannot scale linearly and are reported but not checked.
+
+The endpoints exercised are read-only, so the servers run without a shared cache
+(CODETECH_ALLOW_LOCAL_CACHE=1, see gunicorn.conf.py) unless CACHE_URL is set.
+
+Usage:
+    python loadtest_workers.py --workers 1 2 4 --clients 8 --duration 10 --path /quiz/1/1
+    python loadtest_workers.py --gunicorn --workers 1 2 4 --min-efficiency 0.8
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def start_server(workers, port, use_gunicorn):
+    env = dict(os.environ)
+    env.setdefault("CODETECH_RATE_LIMITS", "0")  # All load comes from one client address
+    env.setdefault("CODETECH_ALLOW_LOCAL_CACHE", "1")  # Read-only load; nothing needs shared state
+    if use_gunicorn:
+        env["WEB_CONCURRENCY"] = str(workers)
+        env["BIND"] = f"127.0.0.1:{port}"
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/openapi.json")
+            if conn.getresponse().status == 200:
+                # Give the remaining workers a moment to finish booting
+                time.sleep(1.0)
+                return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"server with {workers} worker(s) did not start")
+
+def client_loop(args):
+    """One client process: sequential keep-alive requests until the deadline"""
+    port, path, deadline = args
+    latencies = []
+    errors = 0
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    return latencies, errors
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run_load(port, path, clients, duration):
+    deadline = time.time() + duration
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(client_loop, [(port, path, deadline)] * clients)
+    latencies = sorted(l for lat, _ in results for l in lat)
+    errors = sum(e for _, e in results)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "mean_ms": (statistics.fmean(latencies) * 1000) if latencies else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput vs. worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=max(2, multiprocessing.cpu_count()))
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--path", default="/quiz/1/1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--gunicorn", action="store_true", help="use gunicorn.conf.py instead of uvicorn --workers")
+    parser.add_argument("--min-efficiency", type=float, default=0.75,
+                        help="fail if scaling efficiency drops below this (1.0 = perfectly linear)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    cpus = multiprocessing.cpu_count()
+    report = {"path": args.path, "clients": args.clients, "duration": args.duration, "cpus": cpus,
+              "min_efficiency": args.min_efficiency, "runs": []}
+    baseline = None
+    for workers in args.workers:
+        proc = start_server(workers, args.port, args.gunicorn)
+        try:
+            result = run_load(args.port, args.path, args.clients, args.duration)
+        finally:
+            proc.terminate()
+            proc.wait()
+        if baseline is None:
+            baseline = result["rps"] / workers
+        result["workers"] = workers
+        result["scaling_efficiency"] = result["rps"] / (baseline * workers) if baseline else 0.0
+        # Linear scaling needs a CPU per worker and a client to keep each one busy
+        result["checked"] = workers <= min(cpus, args.clients)
+        result["near_linear"] = result["scaling_efficiency"] >= args.min_efficiency
+        report["runs"].append(result)
+        verdict = ("ok" if result["near_linear"] else "BELOW TARGET") if result["checked"] else "not checked"
+        print(f"workers={workers:<3} rps={result['rps']:8.1f} p50={result['p50_ms']:6.1f}ms "
+              f"p95={result['p95_ms']:6.1f}ms errors={result['errors']} "
+              f"efficiency={result['scaling_efficiency']:.2f} ({verdict})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    failed = [run["workers"] for run in report["runs"] if run["checked"] and not run["near_linear"]]
+    if failed:
+        print(f"Scaling below {args.min_efficiency:.2f} efficiency at workers={failed}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Near-linear scaling (efficiency >= {args.min_efficiency:.2f}) at every checked worker count")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# =============================================================================
+# METRICS - PROMETHEUS TEXT EXPOSITION
+# =============================================================================
+# Counters, gauges and histograms kept in process memory and rendered in the Prometheus text
+# format (version 0.0.4) by GET /metrics:
+#
+#   MetricsMiddleware   request count and latency per route template (not per raw path, so ids in
+#                       URLs do not create new series) and a gauge of requests in flight
+#   Registry.collector  callbacks run at scrape time for values owned elsewhere: database pool
+#                       usage, cache hits/misses, bcrypt work in progress, per-route SQL totals
+#
+# Every worker process keeps its own numbers; each scrape sees the process that answered it.
+
+import bisect
+import logging
+import threading
+import time
+
+from applog import log_event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values tuple -> value
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value, *labels):
+        """For collectors mirroring a count kept elsewhere (it must only go up)"""
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in sorted(values.items())]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount=1, *labels):
+        self.inc(-amount, *labels)
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+    render = Counter.render
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(labels) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[labels] = (counts, total + value)
+
+    def render(self):
+        with self._lock:
+            values = {k: (list(counts), total) for k, (counts, total) in self._values.items()}
+        lines = self.header()
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, function):
+        """Register function() to refresh gauges/counters right before each scrape (usable as a decorator)"""
+        self.collectors.append(function)
+        return function
+
+    def render(self):
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception as e:  # A failing source must not break the whole scrape
+                log_event("metrics_collector_failed", level=logging.WARNING, collector=getattr(collect, "__name__", repr(collect)), error=str(e))
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """ASGI middleware: requests in flight, and count/latency per method, route template and status"""
+
+    def __init__(self, app, requests, latency, in_flight):
+        self.app = app
+        self.requests = requests  # Counter(method, route, status)
+        self.latency = latency  # Histogram(method, route)
+        self.in_flight = in_flight  # Gauge()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_flight.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.latency.observe(time.perf_counter() - start, scope["method"], route)
+            self.requests.inc(1, scope["method"], route, str(status))
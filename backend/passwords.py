@@ -0,0 +1,84 @@
+# =============================================================================
+# PASSWORD HASHING
+# =============================================================================
+# bcrypt is deliberately slow (~0.1-0.3s per hash) and holds the GIL, so hashing many passwords
+# in one process is serial no matter how many threads run it. hash_passwords() spreads a batch
+# over a process pool instead. The pool uses the "spawn" start method: workers import only this
+# module (not the app), and forking a server process that already runs threads is avoided.
+# bcrypt_queue_depth() counts the hashes and verifications waiting or running in this process
+# (including batches handed to the pool), for the /metrics endpoint.
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+
+from tracing import span
+
+# Password hashing context using bcrypt algorithm
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+HASH_POOL_MIN_BATCH = 8  # Smaller batches are hashed inline; not worth the inter-process round trips
+
+_pool = None
+_pool_workers = 1
+_pool_lock = threading.Lock()
+_queued = 0
+_queued_lock = threading.Lock()
+
+def _track(amount):
+    global _queued
+    with _queued_lock:
+        _queued += amount
+
+def bcrypt_queue_depth():
+    return _queued
+
+def hash_password(password):
+    """Hash a plain text password using bcrypt"""
+    _track(1)
+    try:
+        with span("bcrypt.hash"):
+            return pwd_context.hash(password)
+    finally:
+        _track(-1)
+
+def verify_password(plain_password, hashed_password):
+    """Verify a plain text password against its bcrypt hash"""
+    _track(1)
+    try:
+        with span("bcrypt.verify"):
+            return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        _track(-1)
+
+def _get_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            _pool_workers = int(os.environ.get("CODETECH_HASH_WORKERS", 0)) or os.cpu_count() or 1
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def hash_passwords(passwords):
+    """Hash a batch of passwords; results are in input order"""
+    passwords = list(passwords)
+    if len(passwords) < HASH_POOL_MIN_BATCH:
+        return [hash_password(password) for password in passwords]
+    pool = _get_pool()
+    chunksize = max(1, len(passwords) // (_pool_workers * 4))
+    _track(len(passwords))
+    try:
+        return list(pool.map(hash_password, passwords, chunksize=chunksize))
+    finally:
+        _track(-len(passwords))
+
+def shutdown_pool():
+    """Stop the hashing processes (they are started again on the next large batch)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,95 @@
+# =============================================================================
+# QUESTION POOLS - RANDOMIZED ATTEMPTS FROM PER-LEVEL QUESTION BANKS
+# =============================================================================
+# A pool attempt (POST /quiz/{subject_id}/{level_id}/attempts) asks `size` questions drawn at
+# random from every quiz of the level, with each question's choices shuffled. The draw works on a
+# question bank: the level's questions and choices flattened into parallel lists, built once
+# per level (build_bank) and cached with the catalogue:
+#
+#   questions / prompts   question ids and texts, one entry per question
+#   quizzes               the quiz each question belongs to
+#   offsets               question i's choices are choice_ids[offsets[i]:offsets[i + 1]]
+#   choice_ids / choice_texts
+#   correct               position of the correct choice within its question (-1 = none)
+#
+# Drawing an attempt (draw) is random.sample over question indices plus a seed for the choice
+# shuffle. It runs in microseconds and never touches the database. The attempt records the
+# sampled indices and the seed (see attempts.py), which is enough to rebuild the questions
+# (pool_payload) and the answer key used for grading (pool_answer_key).
+#
+# A pool attempt is practice for the level, not a way through it: finalize logs the score as the
+# level's activity, and only marks a quiz completed when the attempt drew and answered every one
+# of that quiz's questions (covered_quizzes), i.e. when it was as good as taking the quiz itself.
+
+import random
+
+from attempts import UNANSWERED
+
+def build_bank(subject_id, level_id, title, questions):
+    """Bank from [(question_id, quiz_id, text, [(choice_id, text, is_correct), ...]), ...];
+    title is the level's name"""
+    bank = {
+        "subject_id": subject_id, "level_id": level_id, "title": title,
+        "questions": [], "quizzes": [], "prompts": [], "offsets": [0], "choice_ids": [], "choice_texts": [], "correct": [],
+    }
+    for question_id, quiz_id, text, choices in questions:
+        bank["questions"].append(question_id)
+        bank["quizzes"].append(quiz_id)
+        bank["prompts"].append(text)
+        bank["correct"].append(next((i for i, (_, _, is_correct) in enumerate(choices) if is_correct), UNANSWERED))
+        for choice_id, choice_text, _ in choices:
+            bank["choice_ids"].append(choice_id)
+            bank["choice_texts"].append(choice_text)
+        bank["offsets"].append(len(bank["choice_ids"]))
+    return bank
+
+def draw(bank, size, rng=random):
+    """{"questions": sampled bank indices, "seed": choice shuffle seed} for a new attempt"""
+    return {
+        "subject_id": bank["subject_id"],
+        "level_id": bank["level_id"],
+        "questions": rng.sample(range(len(bank["questions"])), min(size, len(bank["questions"]))),
+        "seed": rng.getrandbits(32),
+    }
+
+def pool_answer_key(bank, pool):
+    """Answer key (attempts.answer_key format) for the questions drawn in `pool`"""
+    offsets = bank["offsets"]
+    key = {"quiz_id": None, "questions": [], "choices": [], "texts": [], "correct": [], "correct_choices": []}
+    for i in pool["questions"]:
+        start, end = offsets[i], offsets[i + 1]
+        correct = bank["correct"][i]
+        key["questions"].append(bank["questions"][i])
+        key["choices"].append(bank["choice_ids"][start:end])
+        key["texts"].append(bank["choice_texts"][start:end])
+        key["correct"].append(correct)
+        key["correct_choices"].append(bank["choice_ids"][start + correct] if correct != UNANSWERED else 0)
+    return key
+
+def pool_payload(bank, pool):
+    """Quiz document for a drawn pool (answer protocol 2: options as {id, text}, no answers)"""
+    rng = random.Random(pool["seed"])
+    offsets = bank["offsets"]
+    questions = []
+    for i in pool["questions"]:
+        options = [
+            {"id": bank["choice_ids"][j], "text": bank["choice_texts"][j]}
+            for j in range(offsets[i], offsets[i + 1])
+        ]
+        rng.shuffle(options)
+        questions.append({"id": bank["questions"][i], "question": bank["prompts"][i], "options": options})
+    return {
+        "id": None, "subject_id": bank["subject_id"], "level_id": bank["level_id"], "title": bank["title"],
+        "protocol": 2, "questions": questions,
+    }
+
+def covered_quizzes(bank, pool, positions):
+    """Ids of the quizzes whose questions were all drawn and answered; positions are the attempt's
+    answers, one per drawn question"""
+    remaining = {}
+    for quiz_id in bank["quizzes"]:
+        remaining[quiz_id] = remaining.get(quiz_id, 0) + 1
+    for i, position in zip(pool["questions"], positions):
+        if position != UNANSWERED:
+            remaining[bank["quizzes"][i]] -= 1
+    return sorted(quiz_id for quiz_id, count in remaining.items() if count == 0)
@@ -0,0 +1,191 @@
+# =============================================================================
+# SAMPLING PROFILER - ON-DEMAND PROFILES OF PRODUCTION ROUTES
+# =============================================================================
+# An admin starts a profile for one route (e.g. GET /user/subjects): for `seconds`, `percent` of
+# that route's requests are sampled. While a sampled request runs, a background thread reads the
+# stack of the thread executing it (sys._current_frames) every `interval` seconds. Stacks are
+# aggregated in the collapsed format used by flame graph tools (flamegraph.pl, speedscope,
+# inferno), one line per distinct stack:
+#
+#   GET /user/subjects;main.py:get_user_subjects;main.py:update_user_progress;... 42
+#
+# Endpoints are wrapped by ProfiledRoute (the router's route class). With no profile running
+# the wrapper only reads one module global, so the overhead is negligible; nothing samples
+# outside an active profile. Profiles are per process; with several workers each keeps its own.
+
+import functools
+import inspect
+import os
+import random
+import sys
+import threading
+import time
+
+from fastapi.routing import APIRoute
+
+MAX_SECONDS = 600
+MAX_STACK_DEPTH = 128
+
+class Profile:
+    """One profiling window for a route: which requests to sample, and the stacks collected"""
+
+    def __init__(self, route, method=None, percent=10.0, seconds=60.0, interval=0.01):
+        self.route = route
+        self.method = method.upper() if method else None
+        self.percent = percent
+        self.seconds = seconds
+        self.interval = interval
+        self.started = time.time()
+        self.ends = self.started + seconds
+        self.stopped = None
+        self.requests = 0  # Requests sampled
+        self.samples = 0  # Stacks recorded
+        self.stacks = {}  # collapsed stack -> samples
+        self._threads = {}  # thread ident -> (root label, wrapper code, nesting depth)
+        self._lock = threading.Lock()
+        self._sampler = None
+
+    @property
+    def running(self):
+        return self.stopped is None and time.time() < self.ends
+
+    def wants(self, methods, route):
+        return (
+            route == self.route and (self.method is None or self.method in methods)
+            and self.running and random.random() * 100 < self.percent
+        )
+
+    def enter(self, label, wrapper_code):
+        ident = threading.get_ident()
+        with self._lock:
+            depth = self._threads.get(ident, (None, None, 0))[2]
+            self._threads[ident] = (label, wrapper_code, depth + 1)
+            self.requests += depth == 0
+
+    def leave(self):
+        ident = threading.get_ident()
+        with self._lock:
+            label, code, depth = self._threads[ident]
+            if depth > 1:
+                self._threads[ident] = (label, code, depth - 1)
+            else:
+                del self._threads[ident]
+
+    # --- Sampling ---
+    def start(self):
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        if self.stopped is None:
+            self.stopped = time.time()
+
+    def _sample_loop(self):
+        while self.running:
+            with self._lock:
+                threads = dict(self._threads)
+            if threads:
+                frames = sys._current_frames()
+                for ident, (label, wrapper_code, _) in threads.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        self._record(label, frame, wrapper_code)
+            time.sleep(self.interval)
+        self.stop()
+
+    def _record(self, label, frame, wrapper_code):
+        names = []
+        while frame is not None and frame.f_code is not wrapper_code and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        stack = ";".join([label] + names[::-1])
+        with self._lock:
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples += 1
+
+    # --- Output ---
+    def collapsed(self):
+        with self._lock:
+            stacks = sorted(self.stacks.items(), key=lambda item: -item[1])
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def status(self):
+        return {
+            "route": self.route,
+            "method": self.method,
+            "percent": self.percent,
+            "interval_ms": self.interval * 1000,
+            "started": self.started,
+            "ends": self.stopped or self.ends,
+            "running": self.running,
+            "requests_sampled": self.requests,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+        }
+
+_active = None  # The running (or last finished) Profile
+_start_lock = threading.Lock()
+
+def start_profile(route, method=None, percent=10.0, seconds=60.0, interval=0.01):
+    """Start profiling a route; raises ValueError for bad options or when a profile is already running"""
+    global _active
+    if not 0 < percent <= 100:
+        raise ValueError("percent must be between 0 and 100")
+    if not 0 < seconds <= MAX_SECONDS:
+        raise ValueError(f"seconds must be between 0 and {MAX_SECONDS}")
+    if not 0.001 <= interval <= 1:
+        raise ValueError("interval_ms must be between 1 and 1000")
+    with _start_lock:
+        if _active is not None and _active.running:
+            raise ValueError(f"A profile of {_active.route} is already running")
+        _active = Profile(route, method, percent, seconds, interval)
+        _active.start()
+        return _active
+
+def current_profile():
+    return _active
+
+def _profiled(endpoint, methods, path):
+    """Wrap an endpoint so sampled requests register their thread with the active profile"""
+    methods = set(methods or ("GET",))
+    label = f"{','.join(sorted(methods))} {path}"
+
+    def should_sample():
+        profile = _active
+        if profile is None or profile.stopped is not None:  # Fast path: not profiling
+            return None
+        return profile if profile.wants(methods, path) else None
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            profile = should_sample()
+            if profile is None:
+                return await endpoint(*args, **kwargs)
+            profile.enter(label, wrapper.__code__)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                profile.leave()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            profile = should_sample()
+            if profile is None:
+                return endpoint(*args, **kwargs)
+            profile.enter(label, wrapper.__code__)
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                profile.leave()
+    wrapper.profiled = True
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose endpoint can be sampled by an active profile"""
+
+    def __init__(self, path, endpoint, **kwargs):
+        if not getattr(endpoint, "profiled", False):
+            endpoint = _profiled(endpoint, kwargs.get("methods"), path)
+        super().__init__(path, endpoint, **kwargs)
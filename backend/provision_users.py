@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Bulk user provisioning from CSV, for onboarding a whole cohort at once.
+
+The CSV needs a header row with email and password columns; name and role are optional
+(role defaults to "user"). Rows that fail (invalid email, duplicate, already registered)
+are reported and skipped; every other row is created.
+
+Usage:
+    python provision_users.py cohort.csv
+    python provision_users.py cohort.csv --errors rejected.csv
+"""
+import argparse
+import csv
+import sys
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description="Create users in bulk from a CSV file")
+    parser.add_argument("csv_file", help="CSV with a header row: email,password[,name][,role]")
+    parser.add_argument("--errors", help="write rejected rows (row,email,error) to this CSV file")
+    args = parser.parse_args()
+
+    # Imported here so --help works without a database configured
+    from main import SessionLocal, parse_user_csv, provision_users
+    from passwords import shutdown_pool
+
+    with open(args.csv_file, newline="", encoding="utf-8") as f:
+        try:
+            rows = parse_user_csv(f.read())
+        except ValueError as e:
+            sys.exit(f"{args.csv_file}: {e}")
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        result = provision_users(db, rows)
+    finally:
+        db.close()
+        shutdown_pool()
+    elapsed = time.perf_counter() - start
+
+    print(f"Created {len(result['created'])} of {len(rows)} users in {elapsed:.1f}s")
+    for error in result["errors"]:
+        print(f"  row {error['row']}: {error['email'] or '(no email)'}: {error['error']}")
+    if args.errors and result["errors"]:
+        with open(args.errors, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["row", "email", "error"])
+            writer.writeheader()
+            writer.writerows(result["errors"])
+        print(f"Rejected rows written to {args.errors}")
+    sys.exit(1 if result["errors"] else 0)
+
+if __name__ == "__main__":
+    main()
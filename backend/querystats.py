@@ -0,0 +1,172 @@
+# =============================================================================
+# QUERY STATS - PER-REQUEST SQL COUNTING AND N+1 DETECTION
+# =============================================================================
+# QueryStatsMiddleware opens a RequestQueries record for every HTTP request (held in a context
+# variable, so it follows the request into the threadpool). SQLAlchemy cursor events on every
+# engine (primary, shards, replicas) add each statement to it:
+#
+#   queries     statements executed
+#   db time     time spent inside cursor.execute (after_cursor_execute - before_cursor_execute)
+#   shapes      statements with literals and bound parameters replaced by "?", so the same query
+#               for different rows (the one-query-per-row loop behind an N+1) counts as one shape
+#
+# When the request finishes:
+#   - debug mode adds X-DB-Queries, X-DB-Time-Ms and X-DB-Repeated-Queries response headers
+#   - the totals are added to per-route aggregates (QueryStats.snapshot(), /admin/query-stats)
+#   - a request over the query budget, or repeating one shape n_plus_one_threshold times, is logged
+#     (structured log, see applog.py)
+#
+# Statements run outside a request (background jobs, startup) are not counted.
+
+import contextvars
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from applog import log_event
+
+_current = contextvars.ContextVar("request_queries", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|:\w+|%s|\?")
+_PARAM_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_SPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement):
+    """SQL text with literals and parameters replaced by '?' (IN lists collapse to one '?')"""
+    shape = _STRING.sub("?", statement)
+    shape = _PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PARAM_LIST.sub("?", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+class RequestQueries:
+    """Queries made while serving one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = {}  # shape -> executions
+        self._lock = threading.Lock()  # Shard fan-out runs queries from several threads
+
+    def add(self, statement, seconds):
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    @property
+    def repeated(self):
+        """Executions beyond the first of each shape"""
+        return sum(n - 1 for n in self.shapes.values())
+
+    def most_repeated(self):
+        """(shape, executions) of the most frequent shape, or (None, 0)"""
+        if not self.shapes:
+            return None, 0
+        return max(self.shapes.items(), key=lambda item: item[1])
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    queries = _current.get()
+    if queries is not None and conn.info.get("query_start"):
+        queries.add(statement, time.perf_counter() - conn.info["query_start"].pop())
+
+_installed = False
+
+def install():
+    """Listen on every engine (idempotent)"""
+    global _installed
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _before_execute)
+        event.listen(Engine, "after_cursor_execute", _after_execute)
+        _installed = True
+
+class QueryStats:
+    """Per-route totals, plus the budget and N+1 checks applied to each request"""
+
+    def __init__(self, budget=100, n_plus_one_threshold=10, debug=False):
+        self.budget = budget  # Queries per request before a warning; 0 = no budget
+        self.n_plus_one_threshold = n_plus_one_threshold  # Executions of one shape that count as N+1; 0 = off
+        self.debug = debug
+        self.routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, route, queries):
+        """Add a finished request's queries to its route's totals and log it if it looks wrong"""
+        shape, executions = queries.most_repeated()
+        over_budget = bool(self.budget) and queries.count > self.budget
+        n_plus_one = bool(self.n_plus_one_threshold) and executions >= self.n_plus_one_threshold
+        key = f"{method} {route}"
+        with self._lock:
+            totals = self.routes.setdefault(key, {
+                "requests": 0, "queries": 0, "db_seconds": 0.0, "max_queries": 0,
+                "over_budget": 0, "n_plus_one": 0,
+            })
+            totals["requests"] += 1
+            totals["queries"] += queries.count
+            totals["db_seconds"] += queries.seconds
+            totals["max_queries"] = max(totals["max_queries"], queries.count)
+            totals["over_budget"] += over_budget
+            totals["n_plus_one"] += n_plus_one
+        if over_budget or n_plus_one:
+            log_event("query_budget_exceeded" if over_budget else "repeated_query", level=logging.WARNING,
+                      route=key, queries=queries.count, db_ms=round(queries.seconds * 1000, 1),
+                      budget=self.budget, most_repeated=shape[:200], repeated=executions)
+
+    def snapshot(self):
+        """Per-route totals with averages, busiest routes first"""
+        with self._lock:
+            routes = {key: dict(totals) for key, totals in self.routes.items()}
+        for totals in routes.values():
+            totals["avg_queries"] = round(totals["queries"] / totals["requests"], 2)
+            totals["avg_db_ms"] = round(totals["db_seconds"] * 1000 / totals["requests"], 2)
+            totals["db_seconds"] = round(totals["db_seconds"], 4)
+        return dict(sorted(routes.items(), key=lambda item: -item[1]["queries"]))
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+
+class QueryStatsMiddleware:
+    """ASGI middleware that counts the SQL run for each HTTP request (see QueryStats)"""
+
+    def __init__(self, app, stats):
+        self.app = app
+        self.stats = stats
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        queries = RequestQueries()
+        token = _current.set(queries)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.stats.debug:
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-db-queries", str(queries.count).encode()),
+                    (b"x-db-time-ms", f"{queries.seconds * 1000:.1f}".encode()),
+                    (b"x-db-repeated-queries", str(queries.repeated).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            self.stats.record(scope["method"], getattr(route, "path", "unmatched"), queries)
@@ -0,0 +1,177 @@
+# =============================================================================
+# RATE LIMITING AND ADMISSION CONTROL
+# =============================================================================
+# Expensive endpoints are grouped into classes (auth, grading, analytics, admin_batch; the
+# route -> class map is in main.py). For every request to a classed endpoint, AdmissionMiddleware:
+#
+#   1. takes a token from the caller's bucket for that class: the user's (bearer token subject)
+#      when the request carries a valid token, else the client IP's (ip_factor times larger).
+#      Signed-in users behind one NAT address (a classroom) therefore never share a bucket.
+#      An empty bucket answers 429 with Retry-After. The identity lookup decodes a JWT and a
+#      shared backend makes network calls, so this step runs in the thread pool, never on the
+#      event loop: a slow cache server delays only the requests waiting on it.
+#   2. admits the request only while fewer than `concurrency` requests of that class are running
+#      in this process. Otherwise it answers 503 with Retry-After at once, instead of queueing
+#      work that would time out anyway.
+#
+# Buckets live in process memory (TokenBuckets). With a shared cache server (CACHE_URL),
+# SharedWindowBackend keeps them there so limits hold across instances: each bucket becomes a
+# fixed window of burst / rate seconds admitting `burst` requests, with the local buckets as a
+# fallback while the server is unreachable.
+
+import logging
+import math
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from applog import log_event
+
+class Limit:
+    """Bucket and concurrency settings for one endpoint class"""
+
+    def __init__(self, rate, burst, concurrency):
+        self.rate = rate  # Tokens added per second
+        self.burst = burst  # Bucket size
+        self.concurrency = concurrency  # Requests of the class running at once (per process); 0 = unlimited
+
+    @classmethod
+    def parse(cls, text):
+        """'rate,burst,concurrency', e.g. '0.2,10,8'"""
+        rate, burst, concurrency = (part.strip() for part in text.split(","))
+        return cls(float(rate), int(burst), int(concurrency))
+
+class TokenBuckets:
+    """In-process token buckets; take() returns 0 when allowed, else seconds until a token is available"""
+
+    MAX_KEYS = 100000  # Full buckets are forgotten beyond this
+
+    def __init__(self):
+        self._buckets = {}  # key -> [tokens, last refill (monotonic)]
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst):
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.MAX_KEYS:
+                    self._prune(now)
+                bucket = self._buckets[key] = [float(burst), now]
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / rate
+
+    def _prune(self, now):
+        # A bucket idle long enough to refill is the same as a new one
+        idle = [key for key, (tokens, stamp) in self._buckets.items() if now - stamp > 600]
+        for key in idle or list(self._buckets)[: len(self._buckets) // 2]:
+            del self._buckets[key]
+
+class SharedWindowBackend:
+    """Buckets kept on the shared cache server (INCR per fixed window)"""
+
+    def __init__(self, redis_backend, fallback=None, retry_after=5.0):
+        self.redis = redis_backend
+        self.fallback = fallback or TokenBuckets()
+        self.retry_after = retry_after  # Seconds on the fallback after a server error
+        self._down_until = 0.0
+
+    def take(self, key, rate, burst):
+        if time.monotonic() < self._down_until:
+            return self.fallback.take(key, rate, burst)
+        window = burst / rate
+        now = time.time()
+        index = int(now / window)
+        redis_key = f"{self.redis.prefix}ratelimit:{key}:{index}"
+        try:
+            count = self.redis.command("INCR", redis_key)
+            if count == 1:
+                self.redis.command("PEXPIRE", redis_key, int(window * 1000) + 1000)
+        except Exception as e:
+            self._down_until = time.monotonic() + self.retry_after
+            log_event("rate_limit_backend_unavailable", level=logging.WARNING, error=str(e), fallback_seconds=self.retry_after)
+            return self.fallback.take(key, rate, burst)
+        return 0 if count <= burst else (index + 1) * window - now
+
+class Admission:
+    """Endpoint classes, their limits, and the running/rejected counts (read by /metrics)"""
+
+    def __init__(self, classes, limits, backend=None, identify=None, ip_factor=4, enabled=True):
+        self.classes = classes  # {(method, route path): class name}
+        self.limits = limits  # {class name: Limit}
+        self.backend = backend or TokenBuckets()
+        self.identify = identify  # identify(scope) -> user key or None
+        self.ip_factor = ip_factor
+        self.enabled = enabled
+        self.running = {name: 0 for name in limits}
+        self.rejected = {}  # (class name, status) -> count
+
+    def wait(self, scope, name):
+        """Seconds until the request's bucket for class `name` has a token (0 = allowed). Blocking
+        (JWT decode, shared backend round trips): call it from a worker thread."""
+        limit = self.limits[name]
+        user = self.identify(scope) if self.identify else None
+        if user:
+            return self.backend.take(f"{name}:user:{user}", limit.rate, limit.burst)
+        client = (scope.get("client") or ("unknown",))[0]
+        return self.backend.take(f"{name}:ip:{client}", limit.rate * self.ip_factor, limit.burst * self.ip_factor)
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an Admission's rate and concurrency limits to `routes`"""
+
+    def __init__(self, app, admission, routes):
+        self.app = app
+        self.admission = admission
+        self._routes = [
+            (method, route, admission.classes[(method, route.path)])
+            for route in routes for method in getattr(route, "methods", None) or ()
+            if (method, getattr(route, "path", None)) in admission.classes
+        ]
+
+    def _classify(self, scope):
+        """(class name, route) for the request, or (None, None) for unclassed endpoints"""
+        for method, route, name in self._routes:
+            if method == scope["method"] and route.path_regex.match(scope["path"]):
+                return name, route
+        return None, None
+
+    async def _reject(self, scope, receive, send, name, status, retry_after, detail):
+        rejected = self.admission.rejected
+        rejected[(name, status)] = rejected.get((name, status), 0) + 1
+        response = JSONResponse({"detail": detail}, status_code=status,
+                                headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+        await response(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        admission = self.admission
+        if scope["type"] != "http" or not admission.enabled:
+            await self.app(scope, receive, send)
+            return
+        name, route = self._classify(scope)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        scope["route"] = route  # Lets metrics and query stats label rejected requests by route
+        limit = admission.limits[name]
+
+        # Rate: per user, or per client address for anonymous requests
+        wait = await run_in_threadpool(admission.wait, scope, name)
+        if wait:
+            await self._reject(scope, receive, send, name, 429, wait, "Too many requests, slow down")
+            return
+
+        # Concurrency: shed instead of queueing
+        if limit.concurrency and admission.running[name] >= limit.concurrency:
+            await self._reject(scope, receive, send, name, 503, 1, "Server busy, try again shortly")
+            return
+        admission.running[name] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.running[name] -= 1
@@ -0,0 +1,136 @@
+# =============================================================================
+# READ REPLICAS - ROUTING READ-ONLY ENDPOINTS
+# =============================================================================
+# Read-only endpoints (leaderboard, catalogue, dashboard, admin listings) can be served from
+# replicas of the primary database (REPLICA_URLS). Writes always go to the primary.
+#
+#   Lag:        a monitor thread writes the current time to a one-row heartbeat table on the
+#               primary every check_interval seconds and reads it back from every replica; a
+#               replica is only used while its copy is at most max_lag seconds old. Replicas that
+#               cannot be reached (or do not have the table yet) count as lagging. With no usable
+#               replica, reads go to the primary.
+#   Stickiness: after a user's own write (mark_write), that user's reads go to the primary for
+#               max_lag + check_interval seconds, the longest a usable replica can be behind, so
+#               they always see their own changes. Marks are kept in the shared cache and so
+#               apply on every API instance. Views cached for all users (leaderboard, dashboard)
+#               would still be stale for them, so main.shared_view rebuilds those for a user with
+#               a recent write (wrote_recently; this also applies without replicas).
+#
+# Lag is measured with wall-clock time, so the API hosts' clocks must be in sync (NTP).
+
+import itertools
+import logging
+import threading
+import time
+
+from sqlalchemy import Column, Float, Integer, MetaData, Table, select, update, insert
+from sqlalchemy.orm import sessionmaker
+
+from applog import log_event
+from storage import create_engine_for
+
+heartbeat_metadata = MetaData()
+replica_heartbeat = Table(
+    "replica_heartbeat", heartbeat_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("beat", Float),  # time.time() of the last heartbeat written on the primary
+)
+
+class ReplicaRouter:
+    """Chooses the session for read-only queries: a replica that is caught up, or the primary"""
+
+    def __init__(self, primary_engine, replica_engines, max_lag=5.0, check_interval=1.0, sticky=True, sticky_store=None):
+        self.primary_engine = primary_engine
+        self.replica_engines = list(replica_engines)
+        self.sessionmakers = [sessionmaker(autocommit=False, autoflush=False, bind=e) for e in self.replica_engines]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky = sticky and sticky_store is not None
+        self.sticky_store = sticky_store  # cache.Cache (or anything with set(key, value, ttl) / peek(key))
+        self.lags = [None] * len(self.replica_engines)  # Seconds behind the primary; None = unknown/unreachable
+        self._round_robin = itertools.count()
+        self._monitor = None
+        self._stopping = threading.Event()
+
+    @property
+    def enabled(self):
+        return bool(self.replica_engines)
+
+    @property
+    def sticky_seconds(self):
+        return self.max_lag + self.check_interval
+
+    # --- Lag monitoring ---
+    def check_lag(self):
+        """Write a heartbeat on the primary and measure how far behind each replica is"""
+        now = time.time()
+        with self.primary_engine.begin() as conn:
+            if not conn.execute(update(replica_heartbeat).where(replica_heartbeat.c.id == 1).values(beat=now)).rowcount:
+                conn.execute(insert(replica_heartbeat).values(id=1, beat=now))
+        lags = []
+        for engine in self.replica_engines:
+            try:
+                with engine.connect() as conn:
+                    beat = conn.execute(select(replica_heartbeat.c.beat).where(replica_heartbeat.c.id == 1)).scalar()
+                lags.append(None if beat is None else max(0.0, time.time() - beat))
+            except Exception:
+                lags.append(None)
+        self.lags = lags
+        return lags
+
+    def healthy(self):
+        """Indexes of the replicas that are close enough to the primary to serve reads"""
+        return [i for i, lag in enumerate(self.lags) if lag is not None and lag <= self.max_lag]
+
+    def start(self):
+        if not self.enabled or self._monitor is not None:
+            return
+        heartbeat_metadata.create_all(bind=self.primary_engine, checkfirst=True)
+        self._stopping.clear()
+        self._monitor = threading.Thread(target=self._monitor_loop, name="replica-lag", daemon=True)
+        self._monitor.start()
+
+    def stop(self):
+        if self._monitor is None:
+            return
+        self._stopping.set()
+        self._monitor.join()
+        self._monitor = None
+
+    def _monitor_loop(self):
+        while not self._stopping.is_set():
+            try:
+                self.check_lag()
+            except Exception as e:
+                self.lags = [None] * len(self.replica_engines)  # Primary unreachable: lag unknown
+                log_event("replica_lag_check_failed", level=logging.WARNING, error=str(e))
+            self._stopping.wait(self.check_interval)
+
+    # --- Read-your-writes ---
+    def mark_write(self, key):
+        """Record a write by `key` (e.g. the user's email); their reads stay on the primary for a while"""
+        if self.sticky and key:
+            self.sticky_store.set(f"replica-sticky:{key}", True, self.sticky_seconds)
+
+    def wrote_recently(self, key):
+        """True within sticky_seconds of a write by `key`, whether or not replicas are configured"""
+        return bool(self.sticky and key and self.sticky_store.peek(f"replica-sticky:{key}") is True)
+
+    def is_sticky(self, key):
+        """True while `key`'s reads must go to the primary"""
+        return self.enabled and self.wrote_recently(key)
+
+    # --- Session selection ---
+    def read_session(self, key=None):
+        """Session on a caught-up replica, or None when the read must go to the primary"""
+        if not self.enabled or self.is_sticky(key):
+            return None
+        healthy = self.healthy()
+        if not healthy:
+            return None
+        return self.sessionmakers[healthy[next(self._round_robin) % len(healthy)]]()
+
+def create_replica_router(primary_engine, urls=None, **options):
+    """Router for REPLICA_URLS (comma-separated database URLs); without it every read uses the primary"""
+    urls = [url.strip() for url in (urls or "").split(",") if url.strip()]
+    return ReplicaRouter(primary_engine, [create_engine_for(url, pool_pre_ping=True) for url in urls], **options)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a Redis server, for development and for exercising cache.RedisBackend
+without installing Redis. Speaks RESP2 and implements the commands the API uses
+(PING, GET, SET [EX|PX] [NX], DEL, INCR, EXPIRE, PEXPIRE, FLUSHALL, SELECT, AUTH). EVAL only
+runs the compare-and-delete script of cache.RedisBackend.DELETE_IF.
+
+Usage:
+    python resp_standin.py [--port 6399]
+    CACHE_URL=redis://127.0.0.1:6399/0 uvicorn main:app
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+from cache import RedisBackend
+
+class Store:
+    def __init__(self):
+        self.data = {}  # key -> (value bytes, expires_at or None)
+        self.lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def execute(self, args):
+        command = args[0].upper()
+        with self.lock:
+            if command == b"PING":
+                return "+PONG"
+            if command in (b"SELECT", b"AUTH"):
+                return "+OK"
+            if command == b"GET":
+                entry = self._live(args[1])
+                return entry[0] if entry else None
+            if command == b"SET":
+                key, value, options = args[1], args[2], [a.upper() for a in args[3:]]
+                expires_at = None
+                if b"EX" in options:
+                    expires_at = time.monotonic() + int(args[3 + options.index(b"EX") + 1])
+                if b"PX" in options:
+                    expires_at = time.monotonic() + int(args[3 + options.index(b"PX") + 1]) / 1000.0
+                if b"NX" in options and self._live(key):
+                    return None
+                self.data[key] = (value, expires_at)
+                return "+OK"
+            if command == b"DEL":
+                return sum(1 for key in args[1:] if self._live(key) and self.data.pop(key, None))
+            if command == b"INCR":
+                entry = self._live(args[1])
+                value = int(entry[0]) + 1 if entry else 1
+                self.data[args[1]] = (str(value).encode(), entry[1] if entry else None)
+                return value
+            if command in (b"EXPIRE", b"PEXPIRE"):
+                entry = self._live(args[1])
+                if not entry:
+                    return 0
+                seconds = int(args[2]) if command == b"EXPIRE" else int(args[2]) / 1000.0
+                self.data[args[1]] = (entry[0], time.monotonic() + seconds)
+                return 1
+            if command == b"EVAL":
+                if args[1].decode() != RedisBackend.DELETE_IF:
+                    return Exception("ERR only the compare-and-delete script is supported")
+                entry = self._live(args[3])
+                if not entry or entry[0] != args[4]:
+                    return 0
+                del self.data[args[3]]
+                return 1
+            if command == b"FLUSHALL":
+                self.data.clear()
+                return "+OK"
+        return Exception(f"ERR unknown command '{command.decode()}'")
+
+def encode(reply):
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return f"-{reply}\r\n".encode()
+    if isinstance(reply, str):
+        return f"{reply}\r\n".encode()
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if not line.startswith(b"*"):
+                self.wfile.write(b"-ERR protocol error\r\n")
+                return
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(encode(self.server.store.execute(args)))
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, Handler)
+        self.store = Store()
+
+def serve_in_background(host="127.0.0.1", port=0):
+    """Start a stand-in server on a background thread; returns (server, url)"""
+    server = StandInServer((host, port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"redis://{host}:{server.server_address[1]}/0"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RESP (Redis protocol) stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6399)
+    args = parser.parse_args()
+    server = StandInServer((args.host, args.port))
+    print(f"RESP stand-in listening on redis://{args.host}:{args.port}/0")
+    server.serve_forever()
@@ -0,0 +1,18 @@
+"""
+Seed content for the platform, one module per subject under seed_data.subjects.
+The subject modules are large literal dicts, so they are only imported on demand.
+"""
+
+import importlib
+
+# Order defines subject insertion order (and therefore subject ids on a fresh database)
+SUBJECT_MODULES = [
+    "seed_data.subjects.python_programming",
+    "seed_data.subjects.machine_learning",
+    "seed_data.subjects.javascript",
+    "seed_data.subjects.c_programming",
+]
+
+def load_subjects():
+    """Import the subject modules and return their subject_data dicts"""
+    return [importlib.import_module(name).subject_data for name in SUBJECT_MODULES]
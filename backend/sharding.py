@@ -0,0 +1,120 @@
+# =============================================================================
+# SHARDED DATA ACCESS - PER-USER TABLES
+# =============================================================================
+# user_activity, user_quiz_completion and user_quiz_progress are keyed by user_id and every
+# student query touches only that user's rows, so they can be spread over several databases
+# ("shards"). Everything else (users, content, jobs, ...) stays on the primary database.
+#
+#   ShardRouter    user_id -> shard index -> engine (configured with SHARD_URLS)
+#   ShardSessions  one lazily-opened session per shard for a request or job:
+#                    for_user(user_id)  per-user queries and writes
+#                    fan_out(fn)        cross-user queries; fn(session) runs on every shard
+#                                       in parallel and the caller merges the results
+#
+# Without SHARD_URLS there is a single shard, the primary database, and ShardSessions hands back
+# the caller's own session, so single-database deployments behave exactly as before.
+# Shards are assigned by user_id modulo the shard count: changing the number of shards requires
+# moving rows.
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from storage import create_engine_for
+
+SHARDED_TABLES = ("user_activity", "user_quiz_completion", "user_quiz_progress")
+
+_fan_out_pool = None
+
+def _pool():
+    global _fan_out_pool
+    if _fan_out_pool is None:
+        _fan_out_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="shard")
+    return _fan_out_pool
+
+class ShardRouter:
+    """Maps user IDs to shard engines"""
+
+    def __init__(self, engines, primary=None):
+        self.engines = list(engines)
+        self.primary = primary  # Primary engine, when it is the only shard
+        self.sessionmakers = [sessionmaker(autocommit=False, autoflush=False, bind=e) for e in self.engines]
+
+    @property
+    def count(self):
+        return len(self.engines)
+
+    @property
+    def single(self):
+        """True when per-user tables live on the primary database (no SHARD_URLS)"""
+        return self.primary is not None and self.engines == [self.primary]
+
+    def shard_for(self, user_id):
+        return int(user_id) % len(self.engines)
+
+    def create_tables(self, metadata):
+        """Create the sharded tables on every shard. Foreign keys are left out: the users table
+        they reference lives on the primary database."""
+        tables = [metadata.tables[name] for name in SHARDED_TABLES]
+        for engine in self.engines:
+            with engine.begin() as conn:
+                for table in tables:
+                    conn.execute(CreateTable(table, include_foreign_key_constraints=[], if_not_exists=True))
+                    for index in table.indexes:
+                        conn.execute(CreateIndex(index, if_not_exists=True))
+
+class ShardSessions:
+    """Sessions on the shards one request (or job step) touches. Sessions opened here are
+    committed by commit() and closed by close(); `primary_session` stays the caller's."""
+
+    def __init__(self, router, primary_session=None):
+        self.router = router
+        self.primary_session = primary_session
+        self._sessions = {}
+
+    def shard(self, index):
+        if self.router.single and self.primary_session is not None:
+            return self.primary_session
+        session = self._sessions.get(index)
+        if session is None:
+            session = self._sessions[index] = self.router.sessionmakers[index]()
+        return session
+
+    def for_user(self, user_id):
+        """Session holding the given user's rows"""
+        return self.shard(self.router.shard_for(user_id))
+
+    def all(self):
+        return [self.shard(index) for index in range(self.router.count)]
+
+    def fan_out(self, query):
+        """Run query(session) on every shard (in parallel when there are several); returns the
+        per-shard results in shard order"""
+        sessions = self.all()
+        if len(sessions) == 1:
+            return [query(sessions[0])]
+        # Each call runs in a copy of the caller's context, so per-request state (query stats) follows it
+        contexts = [contextvars.copy_context() for _ in sessions]
+        return list(_pool().map(lambda context, session: context.run(query, session), contexts, sessions))
+
+    def commit(self):
+        for session in self._sessions.values():
+            session.commit()
+
+    def rollback(self):
+        for session in self._sessions.values():
+            session.rollback()
+
+    def close(self):
+        for session in self._sessions.values():
+            session.close()
+        self._sessions = {}
+
+def create_shard_router(primary_engine, urls=None):
+    """Router for SHARD_URLS (comma-separated database URLs); without it the primary is the only shard"""
+    urls = [url.strip() for url in (urls or "").split(",") if url.strip()]
+    if not urls:
+        return ShardRouter([primary_engine], primary=primary_engine)
+    return ShardRouter([create_engine_for(url) for url in urls])
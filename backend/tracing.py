@@ -0,0 +1,329 @@
+# =============================================================================
+# TRACING - OPENTELEMETRY-COMPATIBLE SPANS
+# =============================================================================
+# A small tracer that records spans the way OpenTelemetry does (128-bit trace ids, 64-bit span
+# ids, parent links, attributes, status) and exports them in the OTLP/JSON encoding, so the
+# files can be loaded by an OpenTelemetry Collector (otlpjsonfile receiver) or read directly.
+#
+#   TracingMiddleware   one server span per sampled HTTP request; continues an incoming W3C
+#                       `traceparent` header and returns its own in the response
+#   span(name, ...)     context manager for a child of the current span; a no-op when the
+#                       request is not sampled, so instrumentation is cheap to leave in place
+#   query spans         every SQL statement run inside a sampled request (cursor events on all
+#                       engines), with the statement shape as db.statement
+#
+# Sampling is decided once per trace at the root: an incoming traceparent's sampled flag is
+# honoured, otherwise CODETECH_TRACE_SAMPLE (default 0.1) of requests are traced. Finished spans
+# are queued and written by a background thread in batches, never on the request thread.
+#
+# Exporters (CODETECH_TRACE_EXPORTER):
+#   console            one line per span on stderr
+#   file:traces.jsonl  OTLP/JSON, one ExportTraceServiceRequest per line
+#   package.module:factory  any callable returning an object with export(spans) and shutdown()
+
+import contextvars
+import importlib
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from applog import log_event
+from querystats import statement_shape
+
+SERVICE_NAME = "codetech-api"
+MAX_QUEUE = 10000  # Spans waiting for export; beyond this new spans are dropped
+BATCH_SIZE = 512
+FLUSH_INTERVAL = 2.0  # Seconds
+
+_current = contextvars.ContextVar("current_span", default=None)
+_STOP = object()  # Queued by Tracer.shutdown(): export what is left and exit
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start", "end", "attributes", "error")
+
+    def __init__(self, name, trace_id, parent_id=None, kind="internal", attributes=None):
+        self.trace_id = trace_id
+        self.span_id = random.getrandbits(64) or 1
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self):
+        return ((self.end or time.time_ns()) - self.start) / 1e6
+
+    def to_otlp(self):
+        kinds = {"internal": 1, "server": 2, "client": 3}
+        span = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": kinds.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = f"{self.parent_id:016x}"
+        return span
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+# --- Exporters ---
+class ConsoleExporter:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+
+    def export(self, spans):
+        for s in spans:
+            parent = f" parent={s.parent_id:016x}" if s.parent_id else ""
+            error = f" error={s.error!r}" if s.error else ""
+            self.stream.write(f"span {s.name} {s.duration_ms:.2f}ms trace={s.trace_id:032x} "
+                              f"span={s.span_id:016x}{parent}{error} {json.dumps(s.attributes, default=str)}\n")
+        self.stream.flush()
+
+    def shutdown(self):
+        pass
+
+class FileExporter:
+    """Appends OTLP/JSON export requests to a file, one per line"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans):
+        request = {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "codetech"}, "spans": [s.to_otlp() for s in spans]}],
+        }]}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(request) + "\n")
+
+    def shutdown(self):
+        pass
+
+def create_exporter(spec):
+    """Exporter for a CODETECH_TRACE_EXPORTER value, or None when tracing is off"""
+    if not spec:
+        return None
+    if spec == "console":
+        return ConsoleExporter()
+    if spec.startswith("file:"):
+        return FileExporter(spec[len("file:"):])
+    module, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module), factory)()
+
+# --- Tracer ---
+class Tracer:
+    def __init__(self, exporter=None, sample_rate=1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._queue = queue.Queue(MAX_QUEUE)
+        self._worker = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.exporter is not None
+
+    def start_trace(self, name, traceparent=None, attributes=None):
+        """Root (server) span for a request, or None if the trace is not sampled"""
+        if not self.enabled:
+            return None
+        trace_id = parent_id = None
+        if traceparent:
+            trace_id, parent_id, sampled = _parse_traceparent(traceparent)
+            if trace_id is not None and not sampled:
+                return None
+        if trace_id is None:
+            if random.random() >= self.sample_rate:
+                return None
+            trace_id = random.getrandbits(128) or 1
+        return Span(name, trace_id, parent_id, kind="server", attributes=attributes)
+
+    def finish(self, span):
+        span.end = time.time_ns()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._export_loop, name="trace-export", daemon=True)
+                    self._worker.start()
+
+    def _export_loop(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch[-1] is _STOP:
+                stopping = True
+                batch.pop()
+            if batch:
+                self._export(batch)
+
+    def _export(self, batch):
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            log_event("trace_export_failed", level=logging.WARNING, spans=len(batch), error=str(e))
+
+    def shutdown(self):
+        """Export everything queued so far and stop the export thread"""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._queue.put(_STOP)
+            worker.join()
+        if self.enabled:
+            self.exporter.shutdown()
+
+def _parse_traceparent(header):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header; (None, None, False) if invalid"""
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None, False
+    try:
+        trace_id, parent_id, flags = int(parts[1], 16), int(parts[2], 16), int(parts[3][:2], 16)
+    except ValueError:
+        return None, None, False
+    if not trace_id or not parent_id:
+        return None, None, False
+    return trace_id, parent_id, bool(flags & 1)
+
+tracer = Tracer(
+    create_exporter(os.environ.get("CODETECH_TRACE_EXPORTER")),
+    sample_rate=float(os.environ.get("CODETECH_TRACE_SAMPLE", "0.1")),
+)
+
+@contextmanager
+def span(name, **attributes):
+    """Child span of the current span; does nothing outside a sampled trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent.trace_id, parent.span_id, attributes=attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        tracer.finish(child)
+
+def current_span():
+    return _current.get()
+
+# --- SQL spans ---
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if parent is not None:
+        child = Span("db.query", parent.trace_id, parent.span_id, kind="client", attributes={
+            "db.system": conn.dialect.name, "db.statement": statement_shape(statement)[:1000],
+        })
+        conn.info.setdefault("trace_spans", []).append(child)
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and conn.info.get("trace_spans"):
+        tracer.finish(conn.info["trace_spans"].pop())
+
+def _on_error(exception_context):
+    spans = exception_context.connection.info.get("trace_spans") if exception_context.connection is not None else None
+    if spans and _current.get() is not None:
+        failed = spans.pop()
+        failed.error = str(exception_context.original_exception)
+        tracer.finish(failed)
+
+_installed = False
+
+def install():
+    """Listen on every engine (idempotent)"""
+    global _installed
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _before_execute)
+        event.listen(Engine, "after_cursor_execute", _after_execute)
+        event.listen(Engine, "handle_error", _on_error)
+        _installed = True
+
+class TracingMiddleware:
+    """ASGI middleware: a server span per sampled HTTP request, named after the route template"""
+
+    def __init__(self, app, tracer=tracer):
+        self.app = app
+        self.tracer = tracer
+        if tracer.enabled:
+            install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        root = self.tracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent=headers.get(b"traceparent", b"").decode("latin-1"),
+            attributes={"http.request.method": scope["method"], "url.path": scope["path"]},
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.response.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.error = f"HTTP {message['status']}"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"traceparent", f"00-{root.trace_id:032x}-{root.span_id:016x}-01".encode()),
+                ]
+            await send(message)
+
+        token = _current.set(root)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except Exception as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                root.name = f"{scope['method']} {route}"
+                root.set_attribute("http.route", route)
+            self.tracer.finish(root)
@@ -95,16 +95,19 @@ export async function getQuiz(subjectId: number, levelId: number) {
  * @param levelId - Level ID
  * @param answers - Object with question IDs as keys and selected answers as values
  * @param token - Optional JWT token for authenticated users
+ * @param idempotencyKey - Optional key, one per attempt; repeated submits return the first result
  * @returns Promise with quiz results and score
  */
 export async function submitQuiz(
   subjectId: number,
   levelId: number,
   answers: Record<number, string>,
-  token?: string
+  token?: string,
+  idempotencyKey?: string
 ) {
   const headers: any = { "Content-Type": "application/json" };
   if (token) headers["Authorization"] = `Bearer ${token}`;
+  if (idempotencyKey) headers["Idempotency-Key"] = idempotencyKey;
   const res = await fetch(`${API_URL}/quiz/${subjectId}/${levelId}/submit`, {
     method: "POST",
     headers,
@@ -117,29 +120,50 @@ export async function submitQuiz(
 /**
  * Get quiz questions for a specific quiz by quizId
  * @param quizId - Quiz ID
+ * @param protocol - Answer protocol: 1 (choice texts, includes answers) or 2 (options as { id, text }, no answers)
  * @returns Promise with quiz data
  */
-export async function getQuizById(quizId: number) {
-  const res = await fetch(`${API_URL}/quiz/${quizId}`);
+export async function getQuizById(quizId: number, protocol: number = 1) {
+  const res = await fetch(`${API_URL}/quiz/${quizId}?protocol=${protocol}`);
   if (!res.ok) throw new Error("Quiz not found");
   return res.json();
 }
 
+/**
+ * Get explanations and resources for every question of a quiz.
+ * Only available once the user has completed the quiz (the server answers 403 before that).
+ * @param quizId - Quiz ID
+ * @param token - JWT token
+ * @returns Promise with an object keyed by question ID ({ explanation, resources })
+ */
+export async function getQuizExplanations(quizId: number, token: string) {
+  const res = await fetch(`${API_URL}/quiz/${quizId}/explanations`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!res.ok) throw new Error("Failed to fetch explanations");
+  return res.json();
+}
+
 /**
  * Submit quiz answers for a specific quiz by quizId
  * @param quizId - Quiz ID
  * @param answers - Object with question IDs as keys and selected answers as values
  * @param token - Optional JWT token for authenticated users
- * @returns Promise with quiz results and score
+ * @param idempotencyKey - Optional key, one per attempt; repeated submits return the first result
+ * @param protocol - Answer protocol: 1 (answers are choice texts) or 2 (answers are choice IDs)
+ * @returns Promise with quiz results and score (protocol 2 adds correct_choices)
  */
 export async function submitQuizById(
   quizId: number,
-  answers: Record<number, string>,
-  token?: string
+  answers: Record<number, string | number>,
+  token?: string,
+  idempotencyKey?: string,
+  protocol: number = 1
 ) {
   const headers: any = { "Content-Type": "application/json" };
   if (token) headers["Authorization"] = `Bearer ${token}`;
-  const res = await fetch(`${API_URL}/quiz/${quizId}/submit`, {
+  if (idempotencyKey) headers["Idempotency-Key"] = idempotencyKey;
+  const res = await fetch(`${API_URL}/quiz/${quizId}/submit?protocol=${protocol}`, {
     method: "POST",
     headers,
     body: JSON.stringify(answers),
@@ -148,6 +172,112 @@ export async function submitQuizById(
   return res.json();
 }
 
+/**
+ * Submit many finished attempts at once (offline sync); safe to retry
+ * @param attempts - List of { attempt_id, quiz_id, answers, protocol? }; attempt_id is generated by the client
+ * @param token - JWT token
+ * @returns Promise with { results }: one { attempt_id, status, ... } per attempt, in order
+ */
+export async function submitQuizBatch(
+  attempts: {
+    attempt_id: string;
+    quiz_id: number;
+    answers: Record<number, string | number>;
+    protocol?: number;
+  }[],
+  token: string
+) {
+  const res = await fetch(`${API_URL}/quiz/submit-batch`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${token}`,
+    },
+    body: JSON.stringify(attempts),
+  });
+  if (!res.ok) throw new Error("Batch submission failed");
+  return res.json();
+}
+
+/**
+ * Start a server-timed attempt of a quiz
+ * @param quizId - Quiz ID
+ * @param token - JWT token
+ * @returns Promise with { attempt_id, deadline, time_left, answered, total }
+ */
+export async function startAttempt(quizId: number, token: string) {
+  const res = await fetch(`${API_URL}/quiz/${quizId}/attempts`, {
+    method: "POST",
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!res.ok) throw new Error("Failed to start attempt");
+  return res.json();
+}
+
+/**
+ * Start an attempt with questions drawn at random from a level's question bank
+ * @param subjectId - Subject ID
+ * @param levelId - Level ID
+ * @param token - JWT token
+ * @param size - Optional number of questions (server default when omitted)
+ * @returns Promise with the attempt status and its quiz ({ questions } with options as { id, text })
+ */
+export async function startPoolAttempt(
+  subjectId: number,
+  levelId: number,
+  token: string,
+  size?: number
+) {
+  const query = size ? `?size=${size}` : "";
+  const res = await fetch(`${API_URL}/quiz/${subjectId}/${levelId}/attempts${query}`, {
+    method: "POST",
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!res.ok) throw new Error("Failed to start attempt");
+  return res.json();
+}
+
+/**
+ * Save answers to an attempt as they are chosen
+ * @param attemptId - Attempt ID from startAttempt
+ * @param answers - Object with question IDs as keys and selected answers as values
+ * @param token - JWT token
+ * @param protocol - Answer protocol: 1 (answers are choice texts) or 2 (answers are choice IDs)
+ * @returns Promise with the attempt's status (time_left, answered)
+ */
+export async function saveAttemptAnswers(
+  attemptId: string,
+  answers: Record<number, string | number>,
+  token: string,
+  protocol: number = 1
+) {
+  const res = await fetch(`${API_URL}/attempts/${attemptId}/answers?protocol=${protocol}`, {
+    method: "PUT",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${token}`,
+    },
+    body: JSON.stringify(answers),
+  });
+  if (!res.ok) throw new Error("Failed to save answer");
+  return res.json();
+}
+
+/**
+ * Grade and record an attempt; calling it again returns the same result
+ * @param attemptId - Attempt ID from startAttempt
+ * @param token - JWT token
+ * @returns Promise with { score, correct, total, seconds, correct_choices }
+ */
+export async function finalizeAttempt(attemptId: string, token: string) {
+  const res = await fetch(`${API_URL}/attempts/${attemptId}/finalize`, {
+    method: "POST",
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!res.ok) throw new Error("Quiz submission failed");
+  return res.json();
+}
+
 // =============================================================================
 // GENERAL DATA API FUNCTIONS
 // =============================================================================
@@ -155,10 +285,13 @@ export async function submitQuizById(
 /**
  * Get leaderboard data with user rankings
  * @param period - Time period for leaderboard (default: "all-time")
+ * @param token - Optional JWT token; right after the user's own submit it gets a fresh leaderboard
  * @returns Promise with leaderboard data
  */
-export async function getLeaderboard(period: string = "all-time") {
-  const res = await fetch(`${API_URL}/leaderboard?period=${period}`);
+export async function getLeaderboard(period: string = "all-time", token?: string | null) {
+  const headers: any = {};
+  if (token) headers["Authorization"] = `Bearer ${token}`;
+  const res = await fetch(`${API_URL}/leaderboard?period=${period}`, { headers });
   if (!res.ok) throw new Error("Leaderboard not found");
   return res.json();
 }
@@ -186,10 +319,13 @@ export async function getSubject(subjectId: number) {
 
 /**
  * Get dashboard statistics and data
+ * @param token - Optional JWT token; right after the user's own submit it gets fresh data
  * @returns Promise with dashboard data
  */
-export async function getDashboardData() {
-  const res = await fetch(`${API_URL}/dashboard-data`);
+export async function getDashboardData(token?: string | null) {
+  const headers: any = {};
+  if (token) headers["Authorization"] = `Bearer ${token}`;
+  const res = await fetch(`${API_URL}/dashboard-data`, { headers });
   if (!res.ok) throw new Error("Failed to fetch dashboard data");
   return res.json();
 }
@@ -403,4 +539,161 @@ export async function deleteUser(userId: number, token: string) {
   });
   if (!res.ok) throw new Error("Failed to delete user");
   return res.json();
-}
\ No newline at end of file
+}
+/**
+ * Add a new subject (admin only). The subject may include a full tree of
+ * levels, quizzes and questions in the seed_data format.
+ * @param subject - Subject data ({ name, description, levels })
+ * @param token - JWT access token (must be admin)
+ * @returns Promise with the created subject and inserted row counts
+ */
+export async function addSubject(subject: any, token: string) {
+  const res = await fetch(`${API_URL}/admin/add-subject`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${token}`,
+    },
+    body: JSON.stringify(subject),
+  });
+  if (!res.ok) throw new Error((await res.json()).detail || "Failed to add subject");
+  return res.json();
+}
+
+/**
+ * Add a level (optionally with quizzes and questions) to a subject (admin only)
+ * @param data - { subject_id, level }
+ * @param token - JWT access token (must be admin)
+ * @returns Promise with the created level
+ */
+export async function addLevel(data: any, token: string) {
+  const res = await fetch(`${API_URL}/admin/add-level`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${token}`,
+    },
+    body: JSON.stringify(data),
+  });
+  if (!res.ok) throw new Error((await res.json()).detail || "Failed to add level");
+  return res.json();
+}
+
+/**
+ * Bulk import subject trees in one transaction (admin only).
+ * Existing subjects are extended with any missing levels, quizzes and questions.
+ * @param subjects - Array of subject trees in the seed_data format
+ * @param token - JWT access token (must be admin)
+ * @returns Promise with per-subject insert counts
+ */
+export async function importSubjects(subjects: any[], token: string) {
+  const res = await fetch(`${API_URL}/admin/subjects/import`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${token}`,
+    },
+    body: JSON.stringify(subjects),
+  });
+  if (!res.ok) throw new Error((await res.json()).detail || "Failed to import subjects");
+  return res.json();
+}
+
+/**
+ * Get the status of a background job (admin only)
+ * @param jobId - Job ID returned when the job was queued
+ * @param token - JWT access token (must be admin)
+ * @returns Promise with job status, progress and checkpoint
+ */
+export async function getJob(jobId: string, token: string) {
+  const res = await fetch(`${API_URL}/admin/jobs/${jobId}`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!res.ok) throw new Error("Failed to fetch job");
+  return res.json();
+}
+
+/**
+ * List background jobs, newest first (admin only)
+ * @param token - JWT access token (must be admin)
+ * @param status - Optional status filter (queued, running, completed, failed, cancelled)
+ * @returns Promise with job status list
+ */
+export async function getJobs(token: string, status?: string) {
+  const query = status ? `?status=${encodeURIComponent(status)}` : "";
+  const res = await fetch(`${API_URL}/admin/jobs${query}`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!res.ok) throw new Error("Failed to fetch jobs");
+  return res.json();
+}
+
+/**
+ * Cancel a background job (admin only). A running job stops after its current chunk.
+ * @param jobId - Job ID
+ * @param token - JWT access token (must be admin)
+ * @returns Promise with the job status
+ */
+export async function cancelJob(jobId: string, token: string) {
+  const res = await fetch(`${API_URL}/admin/jobs/${jobId}/cancel`, {
+    method: "POST",
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!res.ok) throw new Error((await res.json()).detail || "Failed to cancel job");
+  return res.json();
+}
+
+/**
+ * Poll a background job until it completes (admin only)
+ * @param jobId - Job ID
+ * @param token - JWT access token (must be admin)
+ * @returns Promise with the final job status; rejects if the job failed or was cancelled
+ */
+export async function waitForJob(jobId: string, token: string, intervalMs: number = 500) {
+  while (true) {
+    const job = await getJob(jobId, token);
+    if (job.status === "completed") return job;
+    if (job.status === "failed" || job.status === "cancelled") {
+      throw new Error(job.error || `Job ${job.status}`);
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
+/**
+ * Reset a user's progress, activities and goals (admin only).
+ * Runs as a background job; resolves once the job has completed.
+ * @param userId - User ID to reset
+ * @param token - JWT access token (must be admin)
+ * @returns Promise with the final job status
+ */
+export async function resetUserProgress(userId: number, token: string) {
+  const res = await fetch(`${API_URL}/admin/reset-user-progress/${userId}`, {
+    method: "POST",
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!res.ok) throw new Error((await res.json()).detail || "Failed to reset user progress");
+  const job = await res.json();
+  return waitForJob(job.job_id, token);
+}
+
+/**
+ * Create users in bulk (admin only). Rows that cannot be created are
+ * reported individually; the rest of the batch is still created.
+ * @param users - CSV text with an email,password[,name][,role] header, or an array of user objects
+ * @param token - JWT access token (must be admin)
+ * @returns Promise with created/failed counts, created users and per-row errors
+ */
+export async function provisionUsers(users: string | any[], token: string) {
+  const isCsv = typeof users === "string";
+  const res = await fetch(`${API_URL}/admin/users/bulk`, {
+    method: "POST",
+    headers: {
+      "Content-Type": isCsv ? "text/csv" : "application/json",
+      Authorization: `Bearer ${token}`,
+    },
+    body: isCsv ? users : JSON.stringify(users),
+  });
+  if (!res.ok) throw new Error((await res.json()).detail || "Failed to provision users");
+  return res.json();
+}